@@ -0,0 +1,223 @@
+"""
+요청 단위 토큰/호출 집계와 예산(budget).
+
+- track_usage(): 요청 처리 구간 동안 현재 컨텍스트에 Usage를 설정
+- usage_tracking.UsageCallbackHandler / CountingEmbeddings가 LLM, 도구, 임베딩 호출을 현재 Usage에 기록
+- UsageAggregator: 라우트별 누적 통계와 주기 리포트
+"""
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+
+@dataclass
+class Usage:
+    """요청 하나가 소비한 LLM/임베딩/도구 호출 및 토큰 수"""
+    llm_calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    embedding_calls: int = 0
+    embedded_texts: int = 0
+    tool_calls: Dict[str, int] = field(default_factory=dict)
+    budget_exhausted: bool = False
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def add_llm_call(self):
+        with self._lock:
+            self.llm_calls += 1
+
+    def add_tokens(self, prompt_tokens: int, completion_tokens: int):
+        with self._lock:
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+
+    def add_embedding_call(self, texts: int):
+        with self._lock:
+            self.embedding_calls += 1
+            self.embedded_texts += texts
+
+    def add_tool_call(self, name: str):
+        with self._lock:
+            self.tool_calls[name] = self.tool_calls.get(name, 0) + 1
+
+    def add(self, other: "Usage"):
+        """다른 Usage를 합산 (여러 파이프라인을 거친 요청의 총 사용량)"""
+        with self._lock:
+            self.llm_calls += other.llm_calls
+            self.prompt_tokens += other.prompt_tokens
+            self.completion_tokens += other.completion_tokens
+            self.embedding_calls += other.embedding_calls
+            self.embedded_texts += other.embedded_texts
+            for name, count in other.tool_calls.items():
+                self.tool_calls[name] = self.tool_calls.get(name, 0) + count
+            self.budget_exhausted = self.budget_exhausted or other.budget_exhausted
+
+    def to_dict(self) -> dict:
+        return {
+            "llm_calls": self.llm_calls,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.total_tokens,
+            "embedding_calls": self.embedding_calls,
+            "embedded_texts": self.embedded_texts,
+            "tool_calls": dict(self.tool_calls),
+            "budget_exhausted": self.budget_exhausted,
+        }
+
+
+@dataclass
+class Budget:
+    """
+    요청당 예산. 한도에 도달하면 에이전트는 도구 없이 최종 답변을 한 번 생성하고 종료.
+    max_llm_calls는 그 최종 답변 호출까지 포함한 개수.
+    """
+    max_llm_calls: Optional[int] = None
+    max_total_tokens: Optional[int] = None
+
+    @classmethod
+    def from_env(cls) -> "Budget":
+        def _int_or_none(name: str, default: Optional[str]) -> Optional[int]:
+            value = os.environ.get(name, default)
+            return int(value) if value else None
+        # recursion_limit(10) 안에서 끝나도록 기본 LLM 호출 한도는 5
+        return cls(
+            max_llm_calls=_int_or_none("AGENT_MAX_LLM_CALLS", "5"),
+            max_total_tokens=_int_or_none("AGENT_MAX_TOTAL_TOKENS", None),
+        )
+
+    def should_finalize(self, usage: Usage) -> bool:
+        """다음 LLM 호출을 최종 답변 호출로 강제해야 하는지 여부"""
+        if self.max_llm_calls is not None and usage.llm_calls >= self.max_llm_calls - 1:
+            return True
+        if self.max_total_tokens is not None and usage.total_tokens >= self.max_total_tokens:
+            return True
+        return False
+
+
+_current_usage: ContextVar[Optional[Usage]] = ContextVar("current_usage", default=None)
+_current_budget: ContextVar[Optional[Budget]] = ContextVar("current_budget", default=None)
+
+
+@contextmanager
+def track_usage(budget: Optional[Budget] = None):
+    """with 블록 안의 LLM/임베딩/도구 호출을 새 Usage에 집계"""
+    usage = Usage()
+    usage_token = _current_usage.set(usage)
+    budget_token = _current_budget.set(budget)
+    try:
+        yield usage
+    finally:
+        _current_usage.reset(usage_token)
+        _current_budget.reset(budget_token)
+
+def current_usage() -> Optional[Usage]:
+    return _current_usage.get()
+
+def current_budget() -> Optional[Budget]:
+    return _current_budget.get()
+
+def usage_callbacks() -> list:
+    """현재 집계 중이면 LangChain config에 넘길 콜백 목록, 아니면 빈 목록"""
+    usage = current_usage()
+    if usage is None:
+        return []
+    from usage_tracking import UsageCallbackHandler
+    return [UsageCallbackHandler(usage)]
+
+
+# 평가 결과 행에 붙이는 사용량 컬럼
+USAGE_COLUMNS = ["latency_ms", "llm_calls", "prompt_tokens", "completion_tokens", "total_tokens", "embedding_calls"]
+
+def usage_columns(usage: Optional[dict]) -> dict:
+    """ChatResponse.usage 형태의 dict를 평가 결과용 평면 컬럼으로 변환 (없으면 None)"""
+    usage = usage or {}
+    return {col: usage.get(col) for col in USAGE_COLUMNS}
+
+
+# --- Aggregation ---
+
+def query_class(usage: Usage) -> str:
+    """비용 분석용 질의 분류: 에이전트 루프 깊이(LLM 호출 수)와 예산 초과 여부"""
+    label = f"llm_calls={usage.llm_calls}"
+    if usage.budget_exhausted:
+        label += ",budget_exhausted"
+    return label
+
+
+class UsageAggregator:
+    """라우트별 / 질의 분류별 누적 사용량과 가장 비싼 질의 목록"""
+    def __init__(self, top_n: int = 5):
+        self.top_n = top_n
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._reset_unlocked()
+
+    def _reset_unlocked(self):
+        self._routes: Dict[str, dict] = {}
+        self._since = time.time()
+
+    def record(self, route: str, query: str, usage: Usage, latency_seconds: float):
+        with self._lock:
+            route_stats = self._routes.setdefault(route, {"classes": {}, "top_queries": []})
+            for bucket in (route_stats, route_stats["classes"].setdefault(query_class(usage), {})):
+                bucket["requests"] = bucket.get("requests", 0) + 1
+                bucket["llm_calls"] = bucket.get("llm_calls", 0) + usage.llm_calls
+                bucket["prompt_tokens"] = bucket.get("prompt_tokens", 0) + usage.prompt_tokens
+                bucket["completion_tokens"] = bucket.get("completion_tokens", 0) + usage.completion_tokens
+                bucket["embedding_calls"] = bucket.get("embedding_calls", 0) + usage.embedding_calls
+                bucket["latency_seconds"] = bucket.get("latency_seconds", 0.0) + latency_seconds
+
+            top: List[dict] = route_stats["top_queries"]
+            top.append({"query": query[:200], "total_tokens": usage.total_tokens, "llm_calls": usage.llm_calls})
+            top.sort(key=lambda q: q["total_tokens"], reverse=True)
+            del top[self.top_n:]
+
+    def report(self, reset: bool = False) -> dict:
+        """누적 통계에 요청당 평균값을 더한 리포트 (reset=True면 리포트 후 집계 초기화)"""
+        def with_means(bucket: dict) -> dict:
+            n = bucket.get("requests", 0) or 1
+            out = {k: v for k, v in bucket.items() if k not in ("classes", "top_queries")}
+            out["mean_total_tokens"] = round((bucket.get("prompt_tokens", 0) + bucket.get("completion_tokens", 0)) / n, 1)
+            out["mean_llm_calls"] = round(bucket.get("llm_calls", 0) / n, 2)
+            out["mean_latency_seconds"] = round(bucket.get("latency_seconds", 0.0) / n, 3)
+            out["latency_seconds"] = round(bucket.get("latency_seconds", 0.0), 3)
+            return out
+
+        with self._lock:
+            routes = {}
+            for route, stats in self._routes.items():
+                routes[route] = with_means(stats)
+                routes[route]["classes"] = {name: with_means(b) for name, b in stats["classes"].items()}
+                routes[route]["top_queries"] = list(stats["top_queries"])
+            report = {"since": self._since, "until": time.time(), "routes": routes}
+            if reset:
+                self._reset_unlocked()
+            return report
+
+
+usage_aggregator = UsageAggregator()
+
+
+def report_usage_periodically(interval_seconds: float, stop_event: threading.Event, output_path: Optional[str] = None):
+    """interval마다 라우트별 리포트를 출력(및 jsonl 파일에 추가)하고 집계를 초기화"""
+    while not stop_event.wait(interval_seconds):
+        report = usage_aggregator.report(reset=True)
+        if not report["routes"]:
+            continue
+        line = json.dumps(report, ensure_ascii=False)
+        print(f"[usage report] {line}")
+        if output_path:
+            with open(output_path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
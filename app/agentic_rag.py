@@ -1,13 +1,19 @@
-from typing import List, Dict, Any
-from langchain_google_genai import ChatGoogleGenerativeAI
+import os
+from typing import List, Dict, Any, Optional
 from langchain_core.messages import SystemMessage, HumanMessage, ToolMessage
 from langchain_core.tools import tool
 
 from langgraph.graph import StateGraph, MessagesState, START, END
 from langgraph.prebuilt import ToolNode, tools_condition
 
+from accounting import current_budget, current_usage, usage_callbacks
+from message_pruning import PrunedMessagesState, parse_tool_content
+from providers import get_chat_model
 from service import get_vectorstore, load_parent_chunks, LLM_MODEL
 
+# 예산 소진 시 최종 답변을 강제하는 지시문 (프롬프트에만 추가, 상태에는 저장하지 않음)
+BUDGET_FINAL_PROMPT = "The tool budget for this request is exhausted. Do not call any tools. Answer now using ONLY the information retrieved so far."
+
 # --- Tools ---
 
 @tool
@@ -25,28 +31,50 @@ def search_child_chunks(query: str) -> List[dict]:
     ]
 
 @tool
-def retrieve_parent_chunks(parent_ids: List[str]) -> List[str]:
+def retrieve_parent_chunks(parent_ids: List[str]) -> List[dict]:
     """parent_id로 전체 문맥(부모 청크) 조회."""
     docs = load_parent_chunks(parent_ids)
-    return [doc.page_content for doc in docs]
+    return [
+        {
+            "content": doc.page_content,
+            "parent_id": doc.metadata.get("parent_id"),
+            "source": doc.metadata.get("source", "unknown")
+        }
+        for doc in docs
+    ]
 
 
 class AgenticRAG:
     """
     Agent-based RAG pipeline using LangGraph.
+
+    prune_history: 이전 스텝의 도구 결과를 출처/요약만 남기고 정리할지 여부
+    (기본값: AGENT_PRUNE_HISTORY 환경 변수, 미설정 시 True)
     """
-    def __init__(self):
+    def __init__(self, prune_history: Optional[bool] = None):
+        if prune_history is None:
+            prune_history = os.environ.get("AGENT_PRUNE_HISTORY", "true").lower() in ("1", "true", "yes")
+        self.prune_history = prune_history
         self.app = self._build_graph()
         
     def _build_graph(self):
-        llm = ChatGoogleGenerativeAI(model=LLM_MODEL, temperature=0)
+        llm = get_chat_model(LLM_MODEL, temperature=0)
         tools = [search_child_chunks, retrieve_parent_chunks]
         llm_with_tools = llm.bind_tools(tools)
 
-        def agent_node(state: MessagesState):
+        # state 타입 힌트를 두지 않아야 그래프의 state_schema(정리 여부에 따라 다름)를 그대로 사용
+        def agent_node(state):
+            usage = current_usage()
+            budget = current_budget()
+            if usage is not None and budget is not None and budget.should_finalize(usage):
+                # 도구 없이 호출하면 tools_condition이 END로 보내므로 루프가 여기서 종료
+                usage.budget_exhausted = True
+                messages = state["messages"] + [HumanMessage(content=BUDGET_FINAL_PROMPT)]
+                return {"messages": [llm.invoke(messages)]}
             return {"messages": [llm_with_tools.invoke(state["messages"])]}
 
-        builder = StateGraph(MessagesState)
+        state_schema = PrunedMessagesState if self.prune_history else MessagesState
+        builder = StateGraph(state_schema)
         builder.add_node("agent", agent_node)
         builder.add_node("tools", ToolNode(tools))
 
@@ -56,9 +84,10 @@ class AgenticRAG:
         
         return builder.compile()
 
-    def get_answer(self, query: str) -> Dict[str, Any]:
+    def get_answer(self, query: str, callbacks: Optional[list] = None) -> Dict[str, Any]:
         """
         에이전트 그래프를 실행하여 능동적 검색 및 답변 생성
+        callbacks: 사용량 집계 외에 추가로 붙일 LangChain 콜백 (벤치마크 등)
         """
         system_prompt = """You are a helpful RAG assistant.
         1. First, ALWAYS search for relevant information using 'search_child_chunks'.
@@ -67,35 +96,31 @@ class AgenticRAG:
         """
 
         inputs = {"messages": [SystemMessage(content=system_prompt), HumanMessage(content=query)]}
-        final_state = self.app.invoke(inputs, config={"recursion_limit": 10})
+        final_state = self.app.invoke(inputs, config={"recursion_limit": 10, "callbacks": usage_callbacks() + (callbacks or [])})
         
         messages = final_state["messages"]
         answer = messages[-1].content
         
-        # 출처 추출
-        sources = []
-        seen_sources = set()
+        # 출처 추출 (정리된 히스토리에서는 본문 없이 출처만 남은 항목도 있으므로 본문이 있는 항목 우선)
+        sources = {}
         
         for msg in messages:
-            if isinstance(msg, ToolMessage) and msg.name == "search_child_chunks":
-                try:
-                    import ast
-                    results = ast.literal_eval(msg.content)
-                    if isinstance(results, list):
-                        for res in results:
-                            if isinstance(res, dict) and "source" in res:
-                                src_name = res["source"]
-                                if src_name not in seen_sources:
-                                    sources.append({
-                                        "source": src_name,
-                                        "page": 0,
-                                        "content": res.get("content", "")[:100] + "..."
-                                    })
-                                    seen_sources.add(src_name)
-                except:
-                    pass
+            if isinstance(msg, ToolMessage) and msg.name in ("search_child_chunks", "retrieve_parent_chunks"):
+                results = parse_tool_content(msg.content)
+                if not isinstance(results, list):
+                    continue
+                for res in results:
+                    if isinstance(res, dict) and "source" in res:
+                        src_name = res["source"]
+                        content = res.get("content", "")
+                        if src_name not in sources or (content and sources[src_name]["content"] == "..."):
+                            sources[src_name] = {
+                                "source": src_name,
+                                "page": 0,
+                                "content": content[:100] + "..."
+                            }
                     
         return {
             "answer": answer,
-            "sources": sources
+            "sources": list(sources.values())
         }
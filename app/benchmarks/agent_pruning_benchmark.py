@@ -0,0 +1,150 @@
+"""
+에이전트 메시지 히스토리 정리(pruning) 전후 비교 벤치마크.
+
+evals.jsonl 질문으로 AgenticRAG를 prune_history=False/True 각각 실행해
+LLM 스텝당 지연, 요청당 토큰 수, 정답 대비 token F1을 비교합니다.
+--predictions-dir를 주면 모드별 예측을 jsonl로 저장하므로 evals/evaluate_predictions.py로 Ragas 점수도 낼 수 있습니다.
+
+    python benchmarks/agent_pruning_benchmark.py                  # 현재 provider/인덱스 사용
+    python benchmarks/agent_pruning_benchmark.py --offline --searches 2 --latency-ms 30
+"""
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+server_dir = os.path.dirname(current_dir)
+sys.path.append(server_dir)
+sys.path.append(current_dir)
+
+from offline_fixture import build_offline_index, load_jsonl, use_offline_env
+
+
+def token_f1(prediction: str, ground_truth: str) -> float:
+    pred_tokens = re.findall(r"\w+", prediction.lower())
+    gt_tokens = re.findall(r"\w+", ground_truth.lower())
+    if not pred_tokens or not gt_tokens:
+        return 0.0
+    common = 0
+    remaining = list(gt_tokens)
+    for token in pred_tokens:
+        if token in remaining:
+            remaining.remove(token)
+            common += 1
+    if common == 0:
+        return 0.0
+    precision = common / len(pred_tokens)
+    recall = common / len(gt_tokens)
+    return 2 * precision * recall / (precision + recall)
+
+def make_step_timer():
+    """LLM 호출(에이전트 스텝)별 지연을 기록하는 콜백"""
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class StepTimer(BaseCallbackHandler):
+        def __init__(self):
+            self.started = {}
+            self.latencies_ms = []
+
+        def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+            self.started[run_id] = time.perf_counter()
+
+        def on_llm_end(self, response, *, run_id, **kwargs):
+            start = self.started.pop(run_id, None)
+            if start is not None:
+                self.latencies_ms.append((time.perf_counter() - start) * 1000)
+
+    return StepTimer()
+
+def run_mode(prune: bool, eval_data, budget):
+    from accounting import track_usage
+    from agentic_rag import AgenticRAG
+
+    rag = AgenticRAG(prune_history=prune)
+    timer = make_step_timer()
+    rows = []
+    for item in eval_data:
+        start = time.perf_counter()
+        try:
+            with track_usage(budget) as usage:
+                result = rag.get_answer(item["question"], callbacks=[timer])
+        except Exception as e:
+            print(f"Error processing question '{item['question']}': {e}")
+            continue
+        rows.append({
+            "question": item["question"],
+            "answer": result["answer"],
+            "contexts": [],
+            "ground_truth": item.get("ground_truth", ""),
+            "usage": {**usage.to_dict(), "latency_ms": round((time.perf_counter() - start) * 1000, 1)},
+            "f1": token_f1(result["answer"], item.get("ground_truth", "")),
+        })
+    return rows, timer.latencies_ms
+
+def summarize(rows, step_latencies_ms) -> dict:
+    return {
+        "questions": len(rows),
+        "mean_step_ms": round(statistics.mean(step_latencies_ms), 1) if step_latencies_ms else None,
+        "mean_llm_calls": round(statistics.mean(r["usage"]["llm_calls"] for r in rows), 2) if rows else None,
+        "mean_prompt_tokens": round(statistics.mean(r["usage"]["prompt_tokens"] for r in rows), 1) if rows else None,
+        "mean_total_tokens": round(statistics.mean(r["usage"]["total_tokens"] for r in rows), 1) if rows else None,
+        "mean_latency_ms": round(statistics.mean(r["usage"]["latency_ms"] for r in rows), 1) if rows else None,
+        "mean_f1": round(statistics.mean(r["f1"] for r in rows), 4) if rows else None,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="에이전트 히스토리 정리 전후 스텝 지연/토큰/답변 점수 비교")
+    parser.add_argument("--dataset", default=os.path.join(server_dir, "dataset", "evals.jsonl"))
+    parser.add_argument("--limit", type=int, default=None, help="앞에서부터 N개 질문만 사용")
+    parser.add_argument("--offline", action="store_true", help="fake provider + 임시 인덱스로 실행")
+    parser.add_argument("--searches", type=int, default=2, help="(offline) 에이전트 검색 횟수")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="(offline) fake 모델 호출당 주입 지연")
+    parser.add_argument("--predictions-dir", help="모드별 예측 jsonl 저장 디렉토리 (evaluate_predictions.py 입력용)")
+    args = parser.parse_args()
+
+    work_dir = None
+    if args.offline:
+        work_dir = tempfile.mkdtemp(prefix="pruning_bench_")
+        use_offline_env(work_dir, FAKE_MAX_SEARCHES=args.searches, FAKE_LATENCY_MS=args.latency_ms)
+
+    try:
+        from accounting import Budget
+
+        eval_data = load_jsonl(args.dataset)[:args.limit]
+        if args.offline:
+            build_offline_index(eval_data)
+
+        # 예산으로 recursion_limit 전에 루프를 끝내 두 모드가 같은 조건에서 완료되도록 함
+        budget = Budget.from_env()
+        summaries = {}
+        for prune in (False, True):
+            mode = "pruned" if prune else "full_history"
+            print(f"Running {mode} on {len(eval_data)} questions...")
+            rows, step_latencies = run_mode(prune, eval_data, budget)
+            summaries[mode] = summarize(rows, step_latencies)
+
+            if args.predictions_dir:
+                os.makedirs(args.predictions_dir, exist_ok=True)
+                path = os.path.join(args.predictions_dir, f"predictions_agentic_{mode}.jsonl")
+                with open(path, "w", encoding="utf-8") as f:
+                    for row in rows:
+                        f.write(json.dumps({k: v for k, v in row.items() if k != "f1"}, ensure_ascii=False) + "\n")
+                print(f"Predictions saved to {path}")
+
+        keys = list(next(iter(summaries.values())).keys())
+        print(f"\n{'metric':<22}{'full_history':>14}{'pruned':>14}")
+        for key in keys:
+            full, pruned = summaries["full_history"][key], summaries["pruned"][key]
+            print(f"{key:<22}{str(full):>14}{str(pruned):>14}")
+    finally:
+        if work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
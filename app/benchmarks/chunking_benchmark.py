@@ -0,0 +1,175 @@
+"""
+청킹 전략 벤치마크.
+
+적재 완료 문서의 캐시된 Markdown 또는 지정한 PDF로 전략별 임시 인덱스를 만들고,
+청크 수 / 인덱스 크기 / 적재 시간 / evals.jsonl 기준 retrieval recall@k를 비교합니다.
+측정 전에 chromadb / langchain / 임베딩 모델 초기화를 한 번 미리 해 두어 첫 전략만 콜드 스타트 비용을 내지 않도록 합니다.
+
+    python benchmarks/chunking_benchmark.py --strategies header_recursive sentence_window --k 4
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+
+# Add server directory to path to allow imports
+current_dir = os.path.dirname(os.path.abspath(__file__))
+server_dir = os.path.dirname(current_dir)
+sys.path.append(server_dir)
+sys.path.append(current_dir)
+
+from offline_fixture import load_jsonl
+
+def dir_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+def _tokens(text: str) -> set:
+    return set("".join(c.lower() if c.isalnum() else " " for c in text).split())
+
+def context_hit(ground_truth_context: str, retrieved_text: str, min_overlap: float = 0.5) -> bool:
+    """
+    정답 문맥이 검색 결과에 포함되었는지 판정.
+    정답 문맥은 '…'로 생략된 발췌문이므로 조각별 토큰 겹침 비율로 비교.
+    """
+    retrieved_tokens = _tokens(retrieved_text)
+    fragments = [f for f in ground_truth_context.replace("...", "…").split("…") if f.strip()]
+    for fragment in fragments:
+        fragment_tokens = _tokens(fragment)
+        if not fragment_tokens:
+            continue
+        if len(fragment_tokens & retrieved_tokens) / len(fragment_tokens) >= min_overlap:
+            return True
+    return False
+
+def recall_at_k(vectorstore, parent_store_dir: str, eval_data, k: int, use_parent: bool) -> float:
+    """정답 문맥이 있는 질문 중 상위 k개 검색 결과에 정답 문맥이 포함된 비율"""
+    import service
+
+    hits = 0
+    total = 0
+    for item in eval_data:
+        gt_contexts = item.get("contexts", [])
+        if not gt_contexts:
+            continue
+        total += 1
+
+        docs = vectorstore.similarity_search(item["question"], k=k)
+        if use_parent:
+            parent_ids = [doc.metadata.get("parent_id") for doc in docs]
+            docs = service.load_parent_chunks(parent_ids, store_dir=parent_store_dir)
+        retrieved_text = "\n".join(doc.page_content for doc in docs)
+
+        if any(context_hit(ctx, retrieved_text) for ctx in gt_contexts):
+            hits += 1
+    return hits / total if total else 0.0
+
+def warmup(strategies, strategy_params: dict, work_dir: str):
+    """
+    시간 측정 없이 저장 + 검색을 한 번 실행해 chromadb/langchain import와 임베딩 모델 생성 비용을 미리 지불.
+    전략별 분할기 import는 validate_strategy의 시험 청킹으로 미리 로드
+    """
+    import service
+    from chunking import validate_strategy
+
+    for strategy in strategies:
+        validate_strategy(strategy, strategy_params.get(strategy, {}))
+
+    persist_directory = os.path.join(work_dir, "_warmup", "chroma_db")
+    parent_chunks, child_chunks = service.chunk_markdown("# 워밍업\n\n워밍업 문서입니다.", "warmup.md")
+    service.store_chunks(
+        parent_chunks, child_chunks,
+        persist_directory=persist_directory,
+        parent_store_dir=os.path.join(work_dir, "_warmup", "parent_store")
+    )
+    service.get_vectorstore(persist_directory=persist_directory).similarity_search("워밍업", k=1)
+
+def run_strategy(strategy: str, params: dict, corpus, eval_data, k: int, use_parent: bool, work_dir: str) -> dict:
+    import service
+
+    persist_directory = os.path.join(work_dir, strategy, "chroma_db")
+    parent_store_dir = os.path.join(work_dir, strategy, "parent_store")
+
+    start = time.perf_counter()
+    chunks_count = 0
+    for source_name, md_text in corpus:
+        parent_chunks, child_chunks = service.chunk_markdown(md_text, source_name, strategy=strategy, **params)
+        chunks_count += service.store_chunks(
+            parent_chunks, child_chunks,
+            persist_directory=persist_directory,
+            parent_store_dir=parent_store_dir
+        )
+    ingest_seconds = time.perf_counter() - start
+
+    vectorstore = service.get_vectorstore(persist_directory=persist_directory)
+    recall = recall_at_k(vectorstore, parent_store_dir, eval_data, k, use_parent)
+
+    return {
+        "strategy": strategy,
+        "chunks_count": chunks_count,
+        "index_bytes": dir_size(os.path.join(work_dir, strategy)),
+        "ingest_seconds": round(ingest_seconds, 3),
+        f"recall@{k}": round(recall, 4),
+    }
+
+def main():
+    from chunking import CHUNKING_STRATEGIES
+
+    parser = argparse.ArgumentParser(description="청킹 전략별 인덱스 비용 및 검색 recall 비교")
+    parser.add_argument("--strategies", nargs="+", default=sorted(CHUNKING_STRATEGIES), help="비교할 청킹 전략")
+    parser.add_argument("--params", default="{}", help='전략별 파라미터 JSON (예: {"token": {"chunk_size": 256}})')
+    parser.add_argument("--pdf", nargs="*", default=[], help="벤치마크할 PDF (미지정 시 적재 완료된 모든 문서)")
+    parser.add_argument("--dataset", default=os.path.join(server_dir, "dataset", "evals.jsonl"))
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--use-parent", action="store_true", help="자식 청크 대신 부모 청크 기준으로 recall 계산")
+    parser.add_argument("--output", help="결과를 저장할 JSON 파일")
+    args = parser.parse_args()
+
+    import service
+
+    work_dir = tempfile.mkdtemp(prefix="chunking_bench_")
+    results = []
+    try:
+        if args.pdf:
+            # 벤치마크 PDF는 적재된 문서가 아니므로 운영 parse_cache가 아닌 임시 캐시에 파싱
+            cache_dir = os.path.join(work_dir, "parse_cache")
+            corpus = [(os.path.basename(p), service.load_markdown(p, cache_dir=cache_dir)) for p in args.pdf]
+        else:
+            corpus = list(service.iter_ingested_markdown())
+        if not corpus:
+            print("벤치마크할 문서가 없습니다. --pdf로 지정하거나 먼저 문서를 적재하세요.")
+            return
+
+        eval_data = load_jsonl(args.dataset)
+        strategy_params = json.loads(args.params)
+        print(f"Benchmarking {len(args.strategies)} strategies on {len(corpus)} documents, {len(eval_data)} questions...")
+        warmup(args.strategies, strategy_params, work_dir)
+
+        for strategy in args.strategies:
+            print(f"- {strategy}")
+            results.append(run_strategy(
+                strategy, strategy_params.get(strategy, {}), corpus, eval_data,
+                args.k, args.use_parent, work_dir
+            ))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    recall_key = f"recall@{args.k}"
+    print(f"\n{'strategy':<20}{'chunks':>10}{'index_KB':>12}{'ingest_s':>12}{recall_key:>12}")
+    for r in results:
+        print(f"{r['strategy']:<20}{r['chunks_count']:>10}{r['index_bytes'] / 1024:>12.1f}"
+              f"{r['ingest_seconds']:>12.2f}{r[recall_key]:>12.3f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"Results saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Import / cold start 시간 벤치마크.
+
+각 대상을 새 Python 프로세스에서 실행해 전체 소요 시간과 `-X importtime` 기준 상위 import 비용을 측정합니다.
+
+    python benchmarks/import_time.py --repeat 5
+"""
+import os
+import re
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+server_dir = os.path.dirname(current_dir)
+
+# (이름, 실행할 인자) - server_dir 기준으로 실행
+TARGETS = [
+    ("import main", ["-c", "import main"]),
+    ("import router", ["-c", "import router"]),
+    ("import service", ["-c", "import service"]),
+    ("evaluate_rag.py --help", [os.path.join("evals", "evaluate_rag.py"), "--help"]),
+    ("evaluate_predictions.py --help", [os.path.join("evals", "evaluate_predictions.py"), "--help"]),
+]
+
+_IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def run_once(args):
+    """새 프로세스로 실행하고 (wall time 초, {top-level 모듈: 누적 us}) 반환"""
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=server_dir, capture_output=True, text=True
+    )
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "failed")
+
+    cumulative = {}
+    for line in proc.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        # 들여쓰기가 1칸인 항목이 최상위 import
+        if match and len(match.group(3)) == 1:
+            cumulative[match.group(4)] = int(match.group(2))
+    return elapsed, cumulative
+
+def main():
+    parser = argparse.ArgumentParser(description="모듈 import 및 CLI 시작 시간 측정")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=5, help="대상별로 표시할 가장 비싼 top-level import 수")
+    args = parser.parse_args()
+
+    print(f"{'target':<34}{'median_ms':>12}{'min_ms':>10}")
+    details = {}
+    for name, target_args in TARGETS:
+        try:
+            runs = [run_once(target_args) for _ in range(args.repeat)]
+        except RuntimeError as e:
+            print(f"{name:<34}{'error':>12}  {e}")
+            continue
+        times = [elapsed * 1000 for elapsed, _ in runs]
+        print(f"{name:<34}{statistics.median(times):>12.1f}{min(times):>10.1f}")
+        details[name] = runs[-1][1]
+
+    for name, cumulative in details.items():
+        top = sorted(cumulative.items(), key=lambda kv: kv[1], reverse=True)[:args.top]
+        print(f"\n[{name}] slowest top-level imports")
+        for module, us in top:
+            print(f"  {module:<40}{us / 1000:>10.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+HTTP 부하 테스트 (외부 의존성 없음: urllib + 스레드).
+
+실행 중인 서버의 채팅 엔드포인트에 evals.jsonl 질문을 동시에 보내 QPS와 지연 분포를 측정합니다.
+네트워크 없이 서버 자체 처리량만 보려면 서버를 RAG_PROVIDER=fake로 실행하세요.
+
+    RAG_PROVIDER=fake uvicorn main:app --port 8000
+    python benchmarks/load_test.py --endpoint /chat/simple --concurrency 8 --requests 200
+"""
+import os
+import json
+import time
+import argparse
+import statistics
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+server_dir = os.path.dirname(current_dir)
+
+from offline_fixture import percentile
+
+
+def load_questions(file_path):
+    questions = []
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                questions.append(json.loads(line)["question"])
+    return questions
+
+def send(url: str, query: str, timeout: float):
+    """요청 1건 전송 후 (성공 여부, 지연 초) 반환"""
+    body = json.dumps({"query": query}, ensure_ascii=False).encode("utf-8")
+    req = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"}, method="POST")
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            resp.read()
+            ok = resp.status == 200
+    except (urllib.error.URLError, TimeoutError):
+        ok = False
+    return ok, time.perf_counter() - start
+
+def run_load(base_url: str, endpoint: str, questions, concurrency: int, total_requests: int, timeout: float) -> dict:
+    url = base_url.rstrip("/") + endpoint
+    queries = [questions[i % len(questions)] for i in range(total_requests)]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda q: send(url, q, timeout), queries))
+    elapsed = time.perf_counter() - start
+
+    latencies = [lat * 1000 for ok, lat in results if ok]
+    errors = sum(1 for ok, _ in results if not ok)
+    return {
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "requests": total_requests,
+        "errors": errors,
+        "qps": round((total_requests - errors) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(statistics.mean(latencies), 1) if latencies else None,
+        "p50_ms": round(percentile(latencies, 50), 1) if latencies else None,
+        "p95_ms": round(percentile(latencies, 95), 1) if latencies else None,
+        "p99_ms": round(percentile(latencies, 99), 1) if latencies else None,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="채팅 엔드포인트 HTTP 부하 테스트")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--endpoint", default="/chat/simple")
+    parser.add_argument("--dataset", default=os.path.join(server_dir, "dataset", "evals.jsonl"))
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    questions = load_questions(args.dataset)
+    result = run_load(args.base_url, args.endpoint, questions, args.concurrency, args.requests, args.timeout)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+if __name__ == "__main__":
+    main()
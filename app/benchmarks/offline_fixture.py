@@ -0,0 +1,70 @@
+"""
+벤치마크 공통 오프라인 픽스처 (RAG_PROVIDER=fake).
+
+- offline_env / use_offline_env: fake provider + 임시 디렉토리 인덱스 환경 변수
+- build_offline_index: evals.jsonl의 정답 문맥을 Markdown 문서 하나로 묶어 인덱스 생성
+- load_jsonl / percentile: 데이터셋 로드, 지연 분포 계산
+
+service / providers 등 app 모듈은 import 시점에 환경 변수를 읽으므로
+use_offline_env는 app 모듈을 import하기 전에 호출해야 합니다.
+"""
+import os
+import sys
+import json
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+server_dir = os.path.dirname(current_dir)
+if server_dir not in sys.path:
+    sys.path.append(server_dir)
+
+# 벤치마크 스크립트는 percentile도 이 모듈에서 import
+from chunking import percentile
+
+EVALS_SOURCE_NAME = "evals_contexts.md"
+
+
+def load_jsonl(file_path):
+    data = []
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                data.append(json.loads(line))
+    return data
+
+def offline_env(work_dir: str, **overrides) -> dict:
+    """
+    현재 환경 + fake provider / work_dir 아래 인덱스 설정 (하위 프로세스 env로도 사용).
+    overrides는 환경 변수 이름=값 (예: FAKE_LATENCY_MS=20)
+    """
+    env = {k: v for k, v in os.environ.items() if k != "EMBEDDING_CACHE_PATH"}
+    env.update({
+        "RAG_PROVIDER": "fake",
+        "CHROMA_DB_DIR": os.path.join(work_dir, "chroma_db"),
+        "PARENT_STORE_DIR": os.path.join(work_dir, "parent_store"),
+        "INDEX_DIR": os.path.join(work_dir, "index"),
+        "USAGE_REPORT_INTERVAL_SEC": "0",
+    })
+    env.update({k: str(v) for k, v in overrides.items()})
+    return env
+
+def use_offline_env(work_dir: str, **overrides):
+    """현재 프로세스에 offline_env 적용 (실제 질의 임베딩 디스크 캐시는 쓰지 않음)"""
+    os.environ.pop("EMBEDDING_CACHE_PATH", None)
+    os.environ.update(offline_env(work_dir, **overrides))
+
+def evals_markdown(eval_data) -> str:
+    """질문별 정답 문맥을 질문 헤더 아래에 모은 Markdown"""
+    return "\n\n".join(
+        f"## {item['question']}\n\n" + "\n\n".join(item.get("contexts", []))
+        for item in eval_data
+    )
+
+def build_offline_index(eval_data) -> int:
+    """evals.jsonl의 정답 문맥으로 인덱스 생성 (generations 모드면 첫 세대 게시). 자식 청크 수 반환"""
+    import service
+
+    return service.ingest_markdown(evals_markdown(eval_data), EVALS_SOURCE_NAME)
+
+if __name__ == "__main__":
+    # worker_scaling.py가 하위 프로세스로 인덱스를 만들 때 사용: python offline_fixture.py <evals.jsonl>
+    print("chunks:", build_offline_index(load_jsonl(sys.argv[1])))
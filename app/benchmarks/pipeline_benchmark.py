@@ -0,0 +1,84 @@
+"""
+오프라인 파이프라인 벤치마크 (RAG_PROVIDER=fake).
+
+evals.jsonl의 정답 문맥으로 임시 인덱스를 만들고, 네트워크 없이
+벡터 검색 / SimpleRAG / AgenticRAG 그래프의 호출당 지연 시간을 측정합니다.
+
+    python benchmarks/pipeline_benchmark.py --repeat 3 --latency-ms 50
+    python benchmarks/pipeline_benchmark.py --repeat 3 --latency-ms 50 --embedding-cache-size 0   # 질의 임베딩 캐시 없이
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+server_dir = os.path.dirname(current_dir)
+sys.path.append(server_dir)
+sys.path.append(current_dir)
+
+from offline_fixture import build_offline_index, load_jsonl, percentile, use_offline_env
+
+
+def summarize(name: str, latencies_ms, errors: int = 0):
+    print(f"{name:<20}{len(latencies_ms):>8}{statistics.mean(latencies_ms):>10.1f}"
+          f"{percentile(latencies_ms, 50):>10.1f}{percentile(latencies_ms, 95):>10.1f}{errors:>8}")
+
+def timed(func, questions, repeat: int):
+    latencies, errors = [], 0
+    for _ in range(repeat):
+        for question in questions:
+            start = time.perf_counter()
+            try:
+                func(question)
+            except Exception:
+                errors += 1
+                continue
+            latencies.append((time.perf_counter() - start) * 1000)
+    return latencies, errors
+
+def main():
+    parser = argparse.ArgumentParser(description="네트워크 없이 검색/그래프 오버헤드 측정")
+    parser.add_argument("--dataset", default=os.path.join(server_dir, "dataset", "evals.jsonl"))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="fake 모델 호출당 주입 지연")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fake 모델 호출당 오류 주입 확률")
+    parser.add_argument("--embedding-cache-size", type=int, default=None, help="질의 임베딩 캐시 크기 (0이면 비활성화)")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="pipeline_bench_")
+    use_offline_env(work_dir, FAKE_LATENCY_MS=args.latency_ms, FAKE_ERROR_RATE=args.error_rate)
+    if args.embedding_cache_size is not None:
+        os.environ["EMBEDDING_CACHE_SIZE"] = str(args.embedding_cache_size)
+
+    try:
+        import service
+        from simple_rag import SimpleRAG
+        from agentic_rag import AgenticRAG
+
+        eval_data = load_jsonl(args.dataset)
+        questions = [item["question"] for item in eval_data]
+
+        chunks_count = build_offline_index(eval_data)
+        print(f"Indexed {chunks_count} chunks; {len(questions)} questions x {args.repeat} runs\n")
+
+        vectorstore = service.get_vectorstore()
+        simple = SimpleRAG()
+        agentic = AgenticRAG()
+
+        print(f"{'stage':<20}{'calls':>8}{'mean_ms':>10}{'p50_ms':>10}{'p95_ms':>10}{'errors':>8}")
+        summarize("vector_search", *timed(lambda q: vectorstore.similarity_search(q, k=5), questions, args.repeat))
+        summarize("simple_rag", *timed(simple.get_answer, questions, args.repeat))
+        summarize("agentic_rag", *timed(agentic.get_answer, questions, args.repeat))
+
+        from embedding_cache import query_embedding_cache
+        stats = query_embedding_cache.stats()
+        print(f"\nquery embedding cache: hit_rate={stats['hit_rate']} hits={stats['hits']} misses={stats['misses']} size={stats['size']}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+/chat 라우팅 임계값(ROUTER_MIN_TOP_SCORE) 튜닝.
+
+evals.jsonl 질문마다 SimpleRAG와 AgenticRAG를 모두 한 번씩 실행해 두고, 임계값 후보별로
+routing.decide가 골랐을 경로의 에이전트 승격 비율, 정답 대비 token F1, 요청당 토큰/지연을 계산합니다.
+(승격된 질문의 비용 = SimpleRAG + AgenticRAG)
+항상 AgenticRAG를 쓸 때보다 F1이 --max-quality-drop 이상 떨어지지 않는 임계값 중 토큰이 가장 적은 값을 추천합니다.
+
+    python benchmarks/routing_tuning.py                         # 현재 provider/인덱스 사용
+    python benchmarks/routing_tuning.py --offline --latency-ms 20
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+server_dir = os.path.dirname(current_dir)
+sys.path.append(server_dir)
+sys.path.append(current_dir)
+
+from agent_pruning_benchmark import token_f1
+from offline_fixture import build_offline_index, load_jsonl, use_offline_env
+
+
+def run_both(eval_data, budget):
+    """질문별 SimpleRAG / AgenticRAG 결과, 사용량, 지연"""
+    from accounting import track_usage
+    from simple_rag import SimpleRAG
+    from agentic_rag import AgenticRAG
+
+    pipelines = {"simple": SimpleRAG(), "agentic": AgenticRAG()}
+    rows = []
+    for item in eval_data:
+        row = {"question": item["question"]}
+        try:
+            for name, pipeline in pipelines.items():
+                start = time.perf_counter()
+                with track_usage(budget if name == "agentic" else None) as usage:
+                    result = pipeline.get_answer(item["question"])
+                row[name] = {
+                    "answer": result["answer"],
+                    "scores": result.get("scores", []),
+                    "f1": token_f1(result["answer"], item.get("ground_truth", "")),
+                    "total_tokens": usage.total_tokens,
+                    "llm_calls": usage.llm_calls,
+                    "latency_ms": (time.perf_counter() - start) * 1000,
+                }
+        except Exception as e:
+            print(f"Error processing question '{item['question']}': {e}")
+            continue
+        rows.append(row)
+    return rows
+
+def evaluate_threshold(rows, threshold) -> dict:
+    """threshold=None이면 항상 simple, "agentic"이면 항상 agentic"""
+    from routing import decide
+
+    picked = []
+    for row in rows:
+        simple, agentic = row["simple"], row["agentic"]
+        if threshold == "agentic":
+            escalate = True
+        elif threshold is None:
+            escalate = False
+        else:
+            escalate = decide(simple, min_top_score=threshold).escalate
+        if escalate:
+            picked.append({
+                "escalated": 1,
+                "f1": agentic["f1"],
+                "total_tokens": simple["total_tokens"] + agentic["total_tokens"],
+                "llm_calls": simple["llm_calls"] + agentic["llm_calls"],
+                "latency_ms": simple["latency_ms"] + agentic["latency_ms"],
+            })
+        else:
+            picked.append({"escalated": 0, **{k: simple[k] for k in ("f1", "total_tokens", "llm_calls", "latency_ms")}})
+
+    return {
+        key: round(statistics.mean(p[key] for p in picked), 4 if key in ("f1", "escalated") else 1)
+        for key in ("escalated", "f1", "total_tokens", "llm_calls", "latency_ms")
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="/chat 라우팅 임계값별 비용/지연/품질 비교")
+    parser.add_argument("--dataset", default=os.path.join(server_dir, "dataset", "evals.jsonl"))
+    parser.add_argument("--limit", type=int, default=None, help="앞에서부터 N개 질문만 사용")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[round(0.05 * i, 2) for i in range(0, 19)])
+    parser.add_argument("--max-quality-drop", type=float, default=0.02, help="항상 agentic 대비 허용 F1 하락폭")
+    parser.add_argument("--offline", action="store_true", help="fake provider + 임시 인덱스로 실행")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="(offline) fake 모델 호출당 주입 지연")
+    parser.add_argument("--output", help="질문별 두 파이프라인 결과를 저장할 jsonl (재분석용)")
+    args = parser.parse_args()
+
+    work_dir = None
+    if args.offline:
+        work_dir = tempfile.mkdtemp(prefix="routing_tuning_")
+        use_offline_env(work_dir, FAKE_LATENCY_MS=args.latency_ms)
+
+    try:
+        from accounting import Budget
+
+        eval_data = load_jsonl(args.dataset)[:args.limit]
+        if args.offline:
+            build_offline_index(eval_data)
+
+        print(f"Running SimpleRAG and AgenticRAG on {len(eval_data)} questions...")
+        rows = run_both(eval_data, Budget.from_env())
+        if not rows:
+            print("No results.")
+            return
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                for row in rows:
+                    f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            print(f"Per-question results saved to {args.output}")
+
+        always_agentic = evaluate_threshold(rows, "agentic")
+        results = [("always_simple", evaluate_threshold(rows, None)), ("always_agentic", always_agentic)]
+        results += [(f"min_top_score={t}", evaluate_threshold(rows, t)) for t in args.thresholds]
+
+        print(f"\n{'policy':<22}{'escalated':>10}{'f1':>8}{'tokens':>10}{'llm_calls':>11}{'latency_ms':>12}")
+        for name, r in results:
+            print(f"{name:<22}{r['escalated']:>10}{r['f1']:>8}{r['total_tokens']:>10}{r['llm_calls']:>11}{r['latency_ms']:>12}")
+
+        candidates = [
+            (r["total_tokens"], t, r) for t, (_, r) in zip(args.thresholds, results[2:])
+            if r["f1"] >= always_agentic["f1"] - args.max_quality_drop
+        ]
+        if candidates:
+            _, threshold, r = min(candidates, key=lambda c: (c[0], c[1]))
+            print(f"\nRecommended: ROUTER_MIN_TOP_SCORE={threshold} "
+                  f"(escalated {r['escalated']:.0%}, f1 {r['f1']} vs always_agentic {always_agentic['f1']}, "
+                  f"tokens {r['total_tokens']} vs {always_agentic['total_tokens']})")
+        else:
+            print("\nNo threshold stays within --max-quality-drop of always_agentic.")
+    finally:
+        if work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+워커 수에 따른 처리량(QPS) 스케일링 벤치마크.
+
+fake provider로 임시 인덱스 세대를 하나 게시한 뒤, 워커 수를 바꿔가며 query 워커 서버를 띄우고
+load_test.run_load로 같은 부하를 보내 QPS와 스케일링 효율(QPS / (워커 1개 QPS x 워커 수))을 비교합니다.
+각 워커는 게시된 세대의 chroma 디렉토리를 자기 사본(INDEX_DIR/readers/<pid>/)으로 복사해 읽으므로 워커 수만큼 벡터 인덱스 사본이 생깁니다.
+
+    python benchmarks/worker_scaling.py --workers 1 2 4 --latency-ms 20
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+import urllib.error
+import urllib.request
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+server_dir = os.path.dirname(current_dir)
+sys.path.append(server_dir)
+sys.path.append(current_dir)
+
+from load_test import load_questions, run_load
+from offline_fixture import offline_env
+
+
+def build_index(env: dict, dataset: str):
+    """evals.jsonl의 정답 문맥으로 첫 인덱스 세대를 게시 (별도 프로세스: service는 import 시 환경 변수를 읽음)"""
+    script = os.path.join(current_dir, "offline_fixture.py")
+    subprocess.run([sys.executable, script, dataset], cwd=server_dir, env=env, check=True)
+
+def wait_ready(base_url: str, timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(base_url + "/health/ready", timeout=2) as resp:
+                if resp.status == 200:
+                    return True
+        except (urllib.error.URLError, ConnectionError, TimeoutError):
+            pass
+        time.sleep(0.5)
+    return False
+
+def run_workers(env: dict, workers: int, port: int, args, questions) -> dict:
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers)],
+        cwd=server_dir,
+        env={**env, "RAG_ROLE": "query"},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        # /health/ready는 요청을 받은 워커 하나의 상태이므로, 예열 부하로 나머지 워커도 준비시킨 뒤 측정
+        if not wait_ready(base_url, args.startup_timeout):
+            raise RuntimeError(f"서버가 {args.startup_timeout}초 안에 준비되지 않았습니다 (workers={workers})")
+        run_load(base_url, args.endpoint, questions, args.concurrency, max(args.concurrency, workers * 4), args.timeout)
+        return run_load(base_url, args.endpoint, questions, args.concurrency, args.requests, args.timeout)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+def main():
+    parser = argparse.ArgumentParser(description="워커 수별 QPS 스케일링 측정 (fake provider)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--endpoint", default="/chat/simple")
+    parser.add_argument("--dataset", default=os.path.join(server_dir, "dataset", "evals.jsonl"))
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="fake 모델 호출당 주입 지연 (요청 처리 중 이벤트 루프를 막는 시간)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--startup-timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="worker_scaling_")
+    env = offline_env(work_dir, FAKE_LATENCY_MS=args.latency_ms, RAG_INDEX_MODE="generations")
+
+    try:
+        questions = load_questions(args.dataset)
+        build_index(env, args.dataset)
+
+        results = {}
+        for workers in args.workers:
+            print(f"Running workers={workers}...")
+            results[workers] = run_workers(env, workers, args.port, args, questions)
+
+        base_qps = results[args.workers[0]]["qps"] / args.workers[0]
+        print(f"\n{'workers':>8}{'qps':>10}{'p50_ms':>10}{'p95_ms':>10}{'errors':>8}{'efficiency':>12}")
+        for workers, stats in results.items():
+            efficiency = stats["qps"] / (base_qps * workers) if base_qps else 0.0
+            print(f"{workers:>8}{stats['qps']:>10}{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['errors']:>8}{efficiency:>12.2f}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import re
+import inspect
+from typing import TYPE_CHECKING, Callable, Dict, List, Tuple, get_type_hints
+
+# langchain 모듈은 import 비용이 커서 실제 청킹 시점에 로드
+if TYPE_CHECKING:
+    from langchain_core.documents import Document
+
+# 청킹 전략: Markdown 텍스트 -> [(부모 청크, [자식 청크, ...]), ...]
+# parent_id / source 메타데이터는 service.chunk_markdown에서 공통으로 부여
+ChunkingStrategy = Callable[..., List[Tuple["Document", List["Document"]]]]
+
+CHUNKING_STRATEGIES: Dict[str, ChunkingStrategy] = {}
+DEFAULT_STRATEGY = "header_recursive"
+
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?。])\s+|\n+")
+
+# 파라미터 허용 범위 (최소, 최대) - None은 제한 없음
+_PARAM_RANGES = {
+    "chunk_size": (1, None),
+    "chunk_overlap": (0, None),
+    "header_levels": (1, 6),
+    "window_size": (0, None),
+    "breakpoint_percentile": (0, 100),
+    "max_chunk_size": (1, None),
+}
+# 검증용 시험 청킹 입력 (문장 하나라 semantic 전략도 임베딩을 호출하지 않음)
+_VALIDATION_SAMPLE = "# 검증\n\n청킹 설정 검증용 문장입니다."
+
+
+def register_strategy(name: str):
+    """청킹 전략 등록 데코레이터"""
+    def decorator(func: ChunkingStrategy) -> ChunkingStrategy:
+        CHUNKING_STRATEGIES[name] = func
+        return func
+    return decorator
+
+def get_strategy(name: str) -> ChunkingStrategy:
+    """이름으로 청킹 전략 조회"""
+    if name not in CHUNKING_STRATEGIES:
+        available = ", ".join(sorted(CHUNKING_STRATEGIES))
+        raise ValueError(f"알 수 없는 청킹 전략입니다: {name} (사용 가능: {available})")
+    return CHUNKING_STRATEGIES[name]
+
+def _check_param(strategy_name: str, name: str, value, expected):
+    if expected in (int, float):
+        # bool은 int의 하위 타입이므로 따로 거름
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or (expected is int and not isinstance(value, int)):
+            raise ValueError(f"청킹 전략 '{strategy_name}'의 {name}은(는) {expected.__name__}이어야 합니다: {value!r}")
+    low, high = _PARAM_RANGES.get(name, (None, None))
+    if low is not None and value < low or high is not None and value > high:
+        raise ValueError(f"청킹 전략 '{strategy_name}'의 {name} 값이 범위({low}~{high if high is not None else ''})를 벗어났습니다: {value!r}")
+
+def validate_strategy(name: str, params: Dict) -> ChunkingStrategy:
+    """
+    전략 이름과 파라미터를 실제 청킹 전에 검증 (잘못되면 ValueError).
+    시그니처/타입/범위를 확인한 뒤 짧은 샘플로 시험 청킹해 선택 의존성(tiktoken 등) 누락도 미리 잡아냄
+    """
+    strategy = get_strategy(name)
+    try:
+        bound = inspect.signature(strategy).bind("", **params)
+    except TypeError as e:
+        raise ValueError(f"청킹 전략 '{name}'의 파라미터가 올바르지 않습니다: {e}")
+    bound.apply_defaults()
+
+    hints = get_type_hints(strategy)
+    values = dict(list(bound.arguments.items())[1:])
+    for param, value in values.items():
+        _check_param(name, param, value, hints.get(param))
+    if "chunk_overlap" in values and values["chunk_overlap"] >= values["chunk_size"]:
+        raise ValueError(
+            f"청킹 전략 '{name}'의 chunk_overlap({values['chunk_overlap']})은 chunk_size({values['chunk_size']})보다 작아야 합니다."
+        )
+
+    try:
+        strategy(_VALIDATION_SAMPLE, **params)
+    except ImportError as e:
+        raise ValueError(f"청킹 전략 '{name}'에 필요한 패키지가 설치되지 않았습니다: {e}")
+    except Exception as e:
+        raise ValueError(f"청킹 전략 '{name}'의 파라미터가 올바르지 않습니다: {e}")
+    return strategy
+
+
+# --- Helpers ---
+
+def split_by_headers(md_text: str, header_levels: int = 3) -> List[Document]:
+    """Markdown 헤더 기준 부모 청크 분할"""
+    from langchain_text_splitters import MarkdownHeaderTextSplitter
+    from langchain_core.documents import Document
+
+    headers_to_split_on = [("#" * level, f"Header {level}") for level in range(1, header_levels + 1)]
+    parent_splitter = MarkdownHeaderTextSplitter(headers_to_split_on=headers_to_split_on)
+    parent_chunks = parent_splitter.split_text(md_text)
+
+    if not parent_chunks:
+        parent_chunks = [Document(page_content=md_text, metadata={})]
+    return parent_chunks
+
+def split_sentences(text: str) -> List[str]:
+    """간단한 문장 분할 (마침표/물음표/느낌표/줄바꿈 기준)"""
+    return [s.strip() for s in _SENTENCE_BOUNDARY.split(text) if s and s.strip()]
+
+def _split_children(parent_chunks: List[Document], splitter) -> List[Tuple[Document, List[Document]]]:
+    return [(parent, splitter.split_documents([parent])) for parent in parent_chunks]
+
+
+# --- Strategies ---
+
+@register_strategy("header_recursive")
+def header_recursive(md_text: str, chunk_size: int = 500, chunk_overlap: int = 100, header_levels: int = 3):
+    """헤더 기준 부모 청크 + 문자 수 기준 재귀 분할 자식 청크 (기본값)"""
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    child_splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    return _split_children(split_by_headers(md_text, header_levels), child_splitter)
+
+@register_strategy("token")
+def token(md_text: str, chunk_size: int = 128, chunk_overlap: int = 16, header_levels: int = 3):
+    """헤더 기준 부모 청크 + 토큰 수 기준 자식 청크 (tiktoken 필요)"""
+    from langchain_text_splitters import TokenTextSplitter
+
+    child_splitter = TokenTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    return _split_children(split_by_headers(md_text, header_levels), child_splitter)
+
+@register_strategy("sentence_window")
+def sentence_window(md_text: str, window_size: int = 2, header_levels: int = 3):
+    """
+    문장 단위 자식 청크 + 앞뒤 window_size 문장을 포함한 창(window)을 부모 청크로 사용.
+    검색은 문장 단위로 정밀하게, 답변 생성에는 주변 문맥을 함께 제공.
+    """
+    from langchain_core.documents import Document
+
+    pairs = []
+    for section in split_by_headers(md_text, header_levels):
+        sentences = split_sentences(section.page_content)
+        for i, sentence in enumerate(sentences):
+            window = " ".join(sentences[max(0, i - window_size): i + window_size + 1])
+            parent = Document(page_content=window, metadata=dict(section.metadata))
+            child = Document(page_content=sentence, metadata=dict(section.metadata))
+            pairs.append((parent, [child]))
+    return pairs
+
+@register_strategy("semantic")
+def semantic(md_text: str, breakpoint_percentile: float = 90.0, max_chunk_size: int = 1500, header_levels: int = 3):
+    """
+    인접 문장 임베딩 간 코사인 거리가 상위 breakpoint_percentile 이상인 지점에서 자식 청크를 분할.
+    문장마다 임베딩을 호출하므로 적재 비용이 가장 큼.
+    """
+    from langchain_core.documents import Document
+    from service import get_embeddings
+
+    embeddings = get_embeddings()
+    pairs = []
+    for section in split_by_headers(md_text, header_levels):
+        sentences = split_sentences(section.page_content)
+        if len(sentences) < 2:
+            pairs.append((section, [Document(page_content=section.page_content, metadata=dict(section.metadata))]))
+            continue
+
+        vectors = embeddings.embed_documents(sentences)
+        distances = [1.0 - _cosine(vectors[i], vectors[i + 1]) for i in range(len(vectors) - 1)]
+        threshold = percentile(distances, breakpoint_percentile)
+
+        children = []
+        current = [sentences[0]]
+        for sentence, distance in zip(sentences[1:], distances):
+            current_len = sum(len(s) for s in current)
+            if distance >= threshold or current_len + len(sentence) > max_chunk_size:
+                children.append(" ".join(current))
+                current = []
+            current.append(sentence)
+        children.append(" ".join(current))
+
+        pairs.append((section, [Document(page_content=c, metadata=dict(section.metadata)) for c in children]))
+    return pairs
+
+
+def _cosine(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm_a = sum(x * x for x in a) ** 0.5
+    norm_b = sum(y * y for y in b) ** 0.5
+    if norm_a == 0 or norm_b == 0:
+        return 0.0
+    return dot / (norm_a * norm_b)
+
+def percentile(values: List[float], pct: float) -> float:
+    """nearest-rank 백분위수 (benchmarks에서도 사용)"""
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[idx]
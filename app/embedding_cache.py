@@ -0,0 +1,210 @@
+"""
+질의(query) 임베딩 캐시.
+
+/chat 요청과 에이전트의 search_child_chunks는 벡터 검색 전에 매번 질의를 원격 임베딩 API로 보냅니다.
+같은 질문(에이전트의 반복 검색, 평가 재실행)은 캐시된 벡터를 재사용합니다.
+
+- 메모리: 최대 EMBEDDING_CACHE_SIZE개 LRU (0이면 캐시 비활성화)
+- 디스크: EMBEDDING_CACHE_PATH를 지정하면 SQLite에 저장해 재시작/다른 워커와 공유
+  (best-effort: 디스크 I/O는 메모리 락 밖에서 스레드별 연결로 수행하고, 실패하면 disk_errors만 집계하고 무시)
+- 문서(청크) 임베딩(embed_documents)은 캐시하지 않음
+- 키는 provider + 모델 + 질의 원문 (모델이 바뀌면 다른 항목)
+
+미리 채우기 (EMBEDDING_CACHE_PATH 필요):
+
+    EMBEDDING_CACHE_PATH=./embedding_cache.sqlite python embedding_cache.py
+    EMBEDDING_CACHE_PATH=./embedding_cache.sqlite python embedding_cache.py dataset/evals.jsonl
+"""
+import os
+import json
+import array
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Iterable, List, Optional
+
+from dotenv import load_dotenv
+from langchain_core.embeddings import Embeddings
+
+# 설정을 import 시점에 읽으므로 .env를 먼저 로드 (python embedding_cache.py로 직접 실행할 때도 적용)
+load_dotenv()
+
+EMBEDDING_CACHE_SIZE = int(os.environ.get("EMBEDDING_CACHE_SIZE", "1024"))
+EMBEDDING_CACHE_PATH = os.environ.get("EMBEDDING_CACHE_PATH")
+
+_base_dir = os.path.dirname(os.path.abspath(__file__))
+# warmup 기본 대상: 평가/데모에서 반복해서 쓰는 질문 세트
+DEFAULT_WARMUP_FILES = [
+    os.path.join(_base_dir, "dataset", "evals.jsonl"),
+    os.path.join(_base_dir, "evals", "questions.jsonl"),
+]
+
+
+class QueryEmbeddingCache:
+    """스레드 안전한 LRU 질의 임베딩 캐시 (선택적으로 SQLite 영속화)"""
+    def __init__(self, max_size: int = EMBEDDING_CACHE_SIZE, path: Optional[str] = EMBEDDING_CACHE_PATH):
+        self.max_size = max_size
+        self.path = path
+        self._entries: "OrderedDict[tuple, List[float]]" = OrderedDict()
+        # _lock은 메모리 LRU와 통계만 보호 (SQLite 작업 중에는 잡지 않음)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "disk_errors": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def _connect(self) -> sqlite3.Connection:
+        """스레드별 SQLite 연결 (동시 접근은 SQLite 자체 락에 맡김)"""
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=1)
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS query_embeddings ("
+                "namespace TEXT NOT NULL, text TEXT NOT NULL, vector BLOB NOT NULL, "
+                "PRIMARY KEY (namespace, text))"
+            )
+            db.commit()
+            self._local.db = db
+        return db
+
+    def _disk_error(self, action: str, error: Exception):
+        with self._lock:
+            self._stats["disk_errors"] += 1
+        print(f"질의 임베딩 디스크 캐시 {action} 실패 (무시): {error}")
+
+    def _disk_get(self, namespace: str, text: str) -> Optional[List[float]]:
+        try:
+            row = self._connect().execute(
+                "SELECT vector FROM query_embeddings WHERE namespace = ? AND text = ?", (namespace, text)
+            ).fetchone()
+        except sqlite3.Error as e:
+            self._disk_error("조회", e)
+            return None
+        return array.array("d", row[0]).tolist() if row is not None else None
+
+    def _disk_put(self, namespace: str, text: str, vector: List[float]):
+        try:
+            db = self._connect()
+            with db:
+                db.execute(
+                    "INSERT OR REPLACE INTO query_embeddings (namespace, text, vector) VALUES (?, ?, ?)",
+                    (namespace, text, array.array("d", vector).tobytes())
+                )
+        except sqlite3.Error as e:
+            self._disk_error("저장", e)
+
+    def _remember(self, key: tuple, vector: List[float]):
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def get(self, namespace: str, text: str) -> Optional[List[float]]:
+        key = (namespace, text)
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return vector
+
+        vector = self._disk_get(namespace, text) if self.path else None
+        with self._lock:
+            if vector is not None:
+                self._remember(key, vector)
+                self._stats["disk_hits"] += 1
+            else:
+                self._stats["misses"] += 1
+        return vector
+
+    def put(self, namespace: str, text: str, vector: List[float]):
+        vector = list(vector)
+        with self._lock:
+            self._remember((namespace, text), vector)
+        if self.path:
+            self._disk_put(namespace, text, vector)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            size = len(self._entries)
+        lookups = stats["hits"] + stats["disk_hits"] + stats["misses"]
+        return {
+            "enabled": self.enabled,
+            "persistent": bool(self.path),
+            "size": size,
+            "max_size": self.max_size,
+            **stats,
+            "hit_rate": round((stats["hits"] + stats["disk_hits"]) / lookups, 4) if lookups else None,
+        }
+
+
+query_embedding_cache = QueryEmbeddingCache()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    embed_query 결과를 query_embedding_cache에 캐시하는 래퍼.
+    사용량 집계(CountingEmbeddings)를 감싸야 실제 API 호출만 embedding_calls로 집계됨.
+    """
+    def __init__(self, inner: Embeddings, namespace: str, cache: QueryEmbeddingCache = query_embedding_cache):
+        self.inner = inner
+        self.namespace = namespace
+        self.cache = cache
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.inner.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        if not self.cache.enabled:
+            return self.inner.embed_query(text)
+        vector = self.cache.get(self.namespace, text)
+        if vector is None:
+            vector = self.inner.embed_query(text)
+            self.cache.put(self.namespace, text, vector)
+        return vector
+
+
+def iter_questions(paths: Iterable[str]) -> Iterable[str]:
+    """jsonl 파일들의 question 필드"""
+    for path in paths:
+        if not os.path.exists(path):
+            print(f"질문 파일이 없습니다: {path}")
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    question = json.loads(line).get("question")
+                    if question:
+                        yield question
+
+def warmup_query_cache(paths: Optional[List[str]] = None) -> dict:
+    """알려진 질문 세트를 미리 임베딩해 캐시에 채움"""
+    from service import get_embeddings
+
+    embeddings = get_embeddings()
+    questions = list(dict.fromkeys(iter_questions(paths or DEFAULT_WARMUP_FILES)))
+    failed = 0
+    for question in questions:
+        try:
+            embeddings.embed_query(question)
+        except Exception as e:
+            failed += 1
+            print(f"질문 임베딩 실패: {question[:50]} ({e})")
+    return {"questions": len(questions), "failed": failed, **query_embedding_cache.stats()}
+
+if __name__ == "__main__":
+    import sys
+
+    if not EMBEDDING_CACHE_PATH:
+        print("EMBEDDING_CACHE_PATH가 설정되지 않아 warmup 결과가 이 프로세스 종료와 함께 사라집니다.")
+    # service가 import하는 embedding_cache 모듈의 캐시 인스턴스를 쓰도록 __main__이 아닌 모듈로 호출
+    import embedding_cache
+    print(json.dumps(embedding_cache.warmup_query_cache(sys.argv[1:] or None), ensure_ascii=False, indent=2))
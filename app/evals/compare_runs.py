@@ -0,0 +1,195 @@
+"""
+두 평가 실행 비교 / 회귀 리포트.
+
+같은 질문끼리 짝지어 메트릭별 평균 차이(candidate - baseline)와 paired bootstrap 신뢰구간,
+질문별 승/패, 지연/토큰 변화를 계산합니다. 회귀가 하나라도 있으면 exit code 1,
+실행을 찾을 수 없으면 exit code 2 (CI 게이트에서 오타와 회귀를 구분).
+
+- 품질 회귀: 평균 차이 <= -threshold 이고 신뢰구간 상한 < 0
+- 비용 회귀: 지연/토큰 평균 증가율 >= cost-threshold 이고 신뢰구간 하한 > 0
+
+    python evals/compare_runs.py simple-baseline agentic-pruned
+    python evals/compare_runs.py <baseline_run_id> latest --threshold 0.03 --show-questions 10
+"""
+import os
+import sys
+import random
+import argparse
+from typing import List, Optional, Tuple
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+server_dir = os.path.dirname(current_dir)
+sys.path.append(server_dir)
+sys.path.append(current_dir)
+
+from accounting import USAGE_COLUMNS
+from run_registry import load_run, mean
+
+# 비교할 사용량 컬럼 (낮을수록 좋음)
+COST_COLUMNS = ["latency_ms", "total_tokens", "llm_calls"]
+
+
+def bootstrap_ci(diffs: List[float], iterations: int, confidence: float, rng: random.Random) -> Tuple[float, float]:
+    """질문별 차이의 평균에 대한 percentile bootstrap 신뢰구간"""
+    n = len(diffs)
+    means = sorted(sum(rng.choices(diffs, k=n)) / n for _ in range(iterations))
+    alpha = (1 - confidence) / 2
+    low = means[int(alpha * (iterations - 1))]
+    high = means[int((1 - alpha) * (iterations - 1))]
+    return low, high
+
+def pair_rows(baseline: dict, candidate: dict) -> List[Tuple[str, dict, dict]]:
+    """같은 질문끼리 짝지음 (질문이 중복되면 순서대로)"""
+    remaining = {}
+    for row in candidate["rows"]:
+        remaining.setdefault(row["question"], []).append(row)
+    pairs = []
+    for row in baseline["rows"]:
+        matches = remaining.get(row["question"])
+        if matches:
+            pairs.append((row["question"], row, matches.pop(0)))
+    return pairs
+
+def compare_values(pairs, section: str, key: str, iterations: int, confidence: float, rng: random.Random) -> Optional[dict]:
+    values = [
+        (base[section].get(key), cand[section].get(key))
+        for _, base, cand in pairs
+    ]
+    values = [(b, c) for b, c in values if b is not None and c is not None]
+    if not values:
+        return None
+    diffs = [c - b for b, c in values]
+    low, high = bootstrap_ci(diffs, iterations, confidence, rng)
+    baseline_mean = mean([b for b, _ in values])
+    return {
+        "n": len(values),
+        "baseline": baseline_mean,
+        "candidate": mean([c for _, c in values]),
+        "delta": mean(diffs),
+        "relative": mean(diffs) / baseline_mean if baseline_mean else None,
+        "ci_low": low,
+        "ci_high": high,
+        "wins": sum(1 for d in diffs if d > 0),
+        "losses": sum(1 for d in diffs if d < 0),
+        "ties": sum(1 for d in diffs if d == 0),
+    }
+
+def compare_runs(baseline: dict, candidate: dict, threshold: float = 0.02, cost_threshold: float = 0.2,
+                 iterations: int = 2000, confidence: float = 0.95, seed: int = 0) -> dict:
+    """메트릭 / 비용 비교 결과와 회귀 목록"""
+    rng = random.Random(seed)
+    pairs = pair_rows(baseline, candidate)
+    metric_names = sorted((set(baseline["summary"]) & set(candidate["summary"])) - set(USAGE_COLUMNS) - {"questions"})
+
+    metrics, costs, regressions = {}, {}, []
+    for name in metric_names:
+        result = compare_values(pairs, "scores", name, iterations, confidence, rng)
+        if result is None:
+            continue
+        result["regression"] = result["delta"] <= -threshold and result["ci_high"] < 0
+        metrics[name] = result
+        if result["regression"]:
+            regressions.append(name)
+
+    for name in COST_COLUMNS:
+        result = compare_values(pairs, "usage", name, iterations, confidence, rng)
+        if result is None:
+            continue
+        # 비용은 낮을수록 좋으므로 승/패를 뒤집어 표시
+        result["wins"], result["losses"] = result["losses"], result["wins"]
+        result["regression"] = (
+            result["relative"] is not None and result["relative"] >= cost_threshold and result["ci_low"] > 0
+        )
+        costs[name] = result
+        if result["regression"]:
+            regressions.append(name)
+
+    # 질문별 변화: 메트릭 평균 차이가 큰 순서
+    per_question = []
+    for question, base, cand in pairs:
+        deltas = [cand["scores"][m] - base["scores"][m] for m in metrics if m in base["scores"] and m in cand["scores"]]
+        if deltas:
+            per_question.append({"question": question, "delta": sum(deltas) / len(deltas)})
+    per_question.sort(key=lambda q: q["delta"])
+
+    return {
+        "paired_questions": len(pairs),
+        "baseline_only": len(baseline["rows"]) - len(pairs),
+        "candidate_only": len(candidate["rows"]) - len(pairs),
+        "metrics": metrics,
+        "costs": costs,
+        "per_question": per_question,
+        "regressions": regressions,
+    }
+
+def _fmt(value, digits: int = 4) -> str:
+    return "-" if value is None else f"{value:.{digits}f}"
+
+def print_report(baseline: dict, candidate: dict, report: dict, show_questions: int):
+    print(f"baseline : {baseline['name']} ({baseline['run_id']})")
+    print(f"candidate: {candidate['name']} ({candidate['run_id']})")
+    print(f"paired questions: {report['paired_questions']} "
+          f"(baseline only {report['baseline_only']}, candidate only {report['candidate_only']})\n")
+
+    header = f"{'':<22}{'baseline':>11}{'candidate':>11}{'delta':>10}{'ci':>22}{'W/L/T':>12}"
+    for title, section, digits in (("metric", "metrics", 4), ("cost", "costs", 1)):
+        if not report[section]:
+            continue
+        print(title + header[len(title):])
+        for name, r in report[section].items():
+            ci = f"[{_fmt(r['ci_low'], digits)}, {_fmt(r['ci_high'], digits)}]"
+            wlt = f"{r['wins']}/{r['losses']}/{r['ties']}"
+            flag = "  REGRESSION" if r["regression"] else ""
+            print(f"{name:<22}{_fmt(r['baseline'], digits):>11}{_fmt(r['candidate'], digits):>11}"
+                  f"{_fmt(r['delta'], digits):>10}{ci:>22}{wlt:>12}{flag}")
+        print()
+
+    if show_questions and report["per_question"]:
+        # per_question은 delta 오름차순: 앞쪽 음수가 패, 뒤쪽 양수가 승
+        losses = [q for q in report["per_question"] if q["delta"] < 0][:show_questions]
+        wins = [q for q in reversed(report["per_question"]) if q["delta"] > 0][:show_questions]
+        print("Largest per-question losses (mean metric delta):")
+        for q in losses:
+            print(f"  {q['delta']:+.4f}  {q['question'][:80]}")
+        if not losses:
+            print("  (none)")
+        print("Largest per-question wins:")
+        for q in wins:
+            print(f"  {q['delta']:+.4f}  {q['question'][:80]}")
+        if not wins:
+            print("  (none)")
+        print()
+
+    if report["regressions"]:
+        print(f"Regressions: {', '.join(report['regressions'])}")
+    else:
+        print("No regressions.")
+
+def main():
+    parser = argparse.ArgumentParser(description="두 평가 실행 비교 (run_id / 실행 이름 / latest)")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.02, help="품질 메트릭 회귀 기준 (평균 점수 하락폭)")
+    parser.add_argument("--cost-threshold", type=float, default=0.2, help="지연/토큰 회귀 기준 (평균 증가율)")
+    parser.add_argument("--iterations", type=int, default=2000, help="bootstrap 반복 횟수")
+    parser.add_argument("--confidence", type=float, default=0.95)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--show-questions", type=int, default=5, help="승/패 상위 질문 출력 개수 (0이면 생략)")
+    args = parser.parse_args()
+
+    try:
+        baseline = load_run(args.baseline)
+        candidate = load_run(args.candidate)
+    except KeyError as e:
+        print(e.args[0])
+        sys.exit(2)
+    report = compare_runs(
+        baseline, candidate,
+        threshold=args.threshold, cost_threshold=args.cost_threshold,
+        iterations=args.iterations, confidence=args.confidence, seed=args.seed
+    )
+    print_report(baseline, candidate, report, args.show_questions)
+    sys.exit(1 if report["regressions"] else 0)
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,6 @@
 import os
 import sys
 import json
-import pandas as pd
-from datasets import Dataset
-from ragas import evaluate
-from ragas.metrics import (
-    answer_relevancy,
-    faithfulness,
-    context_recall,
-    context_precision,
-)
-from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
 
 # Add server directory to path to allow imports
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -23,6 +13,7 @@ except ImportError:
     # If running from root, adjust path
     sys.path.append(os.path.join(os.getcwd(), 'server'))
     from service import LLM_MODEL, EMBEDDING_MODEL
+from accounting import USAGE_COLUMNS, usage_columns
 
 def load_jsonl(file_path):
     data = []
@@ -41,9 +32,33 @@ def _get_arg(name: str, default: str | None = None) -> str | None:
         return default
     return sys.argv[idx + 1]
 
+USAGE = """Usage: python evaluate_predictions.py [--input FILE] [--output FILE] [--name NAME] [--no-register]
+
+  --input        predictions jsonl in this directory (default: predictions_with_gt.jsonl or predictions.jsonl)
+  --output       output csv file name (default: <input>_evaluation_results.csv)
+  --name         run name in the eval run registry (default: <input>)
+  --no-register  do not record this run in the registry (see run_registry.py / compare_runs.py)
+"""
+
 def main():
+    if "--help" in sys.argv or "-h" in sys.argv:
+        print(USAGE)
+        return
+
     input_filename = _get_arg("--input")
     output_filename = _get_arg("--output")
+    run_name = _get_arg("--name")
+
+    # Heavy imports are deferred so that --help and argument errors return immediately
+    from datasets import Dataset
+    from ragas import evaluate
+    from ragas.metrics import (
+        answer_relevancy,
+        faithfulness,
+        context_recall,
+        context_precision,
+    )
+    from providers import get_chat_model, get_embedding_model
 
     print("Starting evaluation of predictions jsonl...")
     
@@ -79,6 +94,7 @@ def main():
     answers = []
     contexts = []
     ground_truths = []
+    usage_rows = []
     
     for item in predictions:
         q = item.get("question")
@@ -100,6 +116,8 @@ def main():
             else:
                 contexts.append([])
             ground_truths.append(gt if gt else "")
+            # /chat 응답의 usage 필드를 그대로 저장한 예측이면 비용/지연 컬럼으로 보존
+            usage_rows.append(usage_columns(item.get("usage")))
             
     # Create HF Dataset
     data_dict = {
@@ -113,8 +131,10 @@ def main():
     
     # 4. Setup Ragas LLM & Embeddings
     print("Initializing Ragas models...")
-    evaluator_llm = ChatGoogleGenerativeAI(model=LLM_MODEL, temperature=0)
-    evaluator_embeddings = GoogleGenerativeAIEmbeddings(model=EMBEDDING_MODEL)
+    # RAG_EVAL_PROVIDER로 평가 모델만 따로 지정 가능 (fake 모델은 Ragas 채점용으로는 의미 없음)
+    eval_provider = os.environ.get("RAG_EVAL_PROVIDER")
+    evaluator_llm = get_chat_model(LLM_MODEL, temperature=0, provider=eval_provider)
+    evaluator_embeddings = get_embedding_model(EMBEDDING_MODEL, provider=eval_provider)
 
     # 5. Run Evaluation
     print("Calculating metrics...")
@@ -141,8 +161,21 @@ def main():
             base = os.path.splitext(os.path.basename(pred_path))[0]
             output_csv = os.path.join(current_dir, f"{base}_evaluation_results.csv")
         results_df = results.to_pandas()
+        # 행 순서는 입력 데이터셋 순서와 동일
+        for col in USAGE_COLUMNS:
+            results_df[col] = [row[col] for row in usage_rows]
         results_df.to_csv(output_csv, index=False)
         print(f"Results saved to {output_csv}")
+
+        if "--no-register" not in sys.argv:
+            from run_registry import record_run, run_config
+            input_base = os.path.splitext(os.path.basename(pred_path))[0]
+            run_id = record_run(
+                run_name or input_base,
+                results_df.to_dict("records"),
+                run_config(pipeline="predictions", input=os.path.basename(pred_path), output=os.path.basename(output_csv))
+            )
+            print(f"Run registered as {run_id}")
         
     except Exception as e:
         print(f"Error during evaluation: {e}")
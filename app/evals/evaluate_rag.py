@@ -1,16 +1,7 @@
 import os
 import sys
 import json
-import pandas as pd
-from datasets import Dataset
-from ragas import evaluate
-from ragas.metrics import (
-    answer_relevancy,
-    faithfulness,
-    context_recall,
-    context_precision,
-)
-from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
+import time
 
 # Add server directory to path to allow imports
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -18,13 +9,12 @@ server_dir = os.path.dirname(current_dir)
 sys.path.append(server_dir)
 
 try:
-    from simple_rag import SimpleRAG
     from service import LLM_MODEL, EMBEDDING_MODEL
 except ImportError:
     # If running from root, adjust path
     sys.path.append(os.path.join(os.getcwd(), 'server'))
-    from simple_rag import SimpleRAG
     from service import LLM_MODEL, EMBEDDING_MODEL
+from accounting import USAGE_COLUMNS, track_usage, usage_columns
 
 def load_dataset(file_path):
     data = []
@@ -34,7 +24,40 @@ def load_dataset(file_path):
                 data.append(json.loads(line))
     return data
 
+def _get_arg(name: str, default: str | None = None) -> str | None:
+    """Tiny argv parser: --name value"""
+    if name not in sys.argv:
+        return default
+    idx = sys.argv.index(name)
+    if idx + 1 >= len(sys.argv):
+        return default
+    return sys.argv[idx + 1]
+
+USAGE = """Usage: python evaluate_rag.py [--name NAME] [--no-register]
+
+  Evaluates predictions_with_gt.jsonl if present, otherwise runs SimpleRAG over dataset/evals.jsonl.
+  Writes results.csv and results.json to this directory.
+
+  --name         run name in the eval run registry (default: simple_rag or predictions_with_gt)
+  --no-register  do not record this run in the registry (see run_registry.py / compare_runs.py)
+"""
+
 def main():
+    if "--help" in sys.argv or "-h" in sys.argv:
+        print(USAGE)
+        return
+
+    # Heavy imports are deferred so that --help and argument errors return immediately
+    from datasets import Dataset
+    from ragas import evaluate
+    from ragas.metrics import (
+        answer_relevancy,
+        faithfulness,
+        context_recall,
+        context_precision,
+    )
+    from providers import get_chat_model, get_embedding_model
+
     # 1. Check if predictions_with_gt.jsonl exists
     pred_file = os.path.join(current_dir, "predictions_with_gt.jsonl")
     
@@ -42,7 +65,9 @@ def main():
     answers = []
     contexts = []
     ground_truths = []
+    usage_rows = []
     
+    pipeline = "predictions" if os.path.exists(pred_file) else "simple"
     if os.path.exists(pred_file):
         print(f"Found existing predictions at {pred_file}. Using them for evaluation.")
         eval_data = load_dataset(pred_file)
@@ -60,6 +85,7 @@ def main():
                 contexts.append([])
                 
             ground_truths.append(item.get("ground_truth", ""))
+            usage_rows.append(usage_columns(item.get("usage")))
             
         print(f"Loaded {len(questions)} items from file.")
         
@@ -67,6 +93,7 @@ def main():
         # Initialize RAG
         print("Initializing SimpleRAG...")
         try:
+            from simple_rag import SimpleRAG
             rag = SimpleRAG()
         except Exception as e:
             print(f"Error initializing RAG: {e}")
@@ -91,7 +118,10 @@ def main():
             
             try:
                 # Get answer from RAG
-                result = rag.get_answer(question)
+                start = time.perf_counter()
+                with track_usage() as usage:
+                    result = rag.get_answer(question)
+                latency_ms = round((time.perf_counter() - start) * 1000, 1)
                 
                 questions.append(question)
                 answers.append(result["answer"])
@@ -103,6 +133,7 @@ def main():
                 
                 contexts.append(retrieved_contexts)
                 ground_truths.append(ground_truth)
+                usage_rows.append(usage_columns({**usage.to_dict(), "latency_ms": latency_ms}))
             except Exception as e:
                 print(f"Error processing question '{question}': {e}")
                 continue
@@ -118,9 +149,11 @@ def main():
     dataset = Dataset.from_dict(data_dict)
     
     # Setup LLM and Embeddings for Ragas
-    # Using the same Google models as the application
-    evaluator_llm = ChatGoogleGenerativeAI(model=LLM_MODEL, temperature=0)
-    evaluator_embeddings = GoogleGenerativeAIEmbeddings(model=EMBEDDING_MODEL)
+    # Using the same models as the application (RAG_PROVIDER)
+    # RAG_EVAL_PROVIDER로 평가 모델만 따로 지정 가능 (fake 모델은 Ragas 채점용으로는 의미 없음)
+    eval_provider = os.environ.get("RAG_EVAL_PROVIDER")
+    evaluator_llm = get_chat_model(LLM_MODEL, temperature=0, provider=eval_provider)
+    evaluator_embeddings = get_embedding_model(EMBEDDING_MODEL, provider=eval_provider)
 
     # Evaluate
     print("Calculating metrics...")
@@ -143,6 +176,9 @@ def main():
         # Save results
         output_csv = os.path.join(current_dir, "results.csv")
         results_df = results.to_pandas()
+        # 행 순서는 입력 데이터셋 순서와 동일
+        for col in USAGE_COLUMNS:
+            results_df[col] = [row[col] for row in usage_rows]
         results_df.to_csv(output_csv, index=False)
         print(f"Results saved to {output_csv}")
 
@@ -150,6 +186,16 @@ def main():
         output_json = output_csv.replace('.csv', '.json')
         results_df.to_json(output_json, orient='records', force_ascii=False, indent=2)
         print(f"Results saved to {output_json}")
+
+        if "--no-register" not in sys.argv:
+            from run_registry import record_run, run_config
+            default_name = "simple_rag" if pipeline == "simple" else "predictions_with_gt"
+            run_id = record_run(
+                _get_arg("--name", default_name),
+                results_df.to_dict("records"),
+                run_config(pipeline=pipeline, output=os.path.basename(output_csv))
+            )
+            print(f"Run registered as {run_id}")
         
     except Exception as e:
         print(f"Error during evaluation: {e}")
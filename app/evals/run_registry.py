@@ -0,0 +1,228 @@
+"""
+평가 실행(run) 레지스트리 - 로컬 SQLite.
+
+evaluate_rag.py / evaluate_predictions.py가 실행마다 설정(config), 질문별 메트릭 점수, 지연/토큰 사용량을 기록합니다.
+비교는 compare_runs.py를 사용하세요.
+
+    python evals/run_registry.py list
+    python evals/run_registry.py show <run>
+    python evals/run_registry.py import evals/results.csv --name simple-baseline   # 기존 결과 CSV 등록
+
+<run>은 run_id, 실행 이름(가장 최근 것), 또는 latest.
+"""
+import os
+import sys
+import json
+import math
+import time
+import uuid
+import sqlite3
+import argparse
+import subprocess
+from contextlib import closing
+from typing import List, Optional
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+server_dir = os.path.dirname(current_dir)
+sys.path.append(server_dir)
+
+from accounting import USAGE_COLUMNS
+
+REGISTRY_PATH = os.environ.get("EVAL_REGISTRY_PATH", os.path.join(current_dir, "runs.sqlite"))
+
+# Ragas 결과 DataFrame에서 질문/입력 데이터 컬럼 (버전에 따라 이름이 다름)
+QUESTION_COLUMNS = ("question", "user_input")
+TEXT_COLUMNS = {
+    "question", "user_input", "answer", "response", "contexts", "retrieved_contexts",
+    "ground_truth", "reference", "reference_contexts",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    config TEXT NOT NULL,
+    summary TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS run_rows (
+    run_id TEXT NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    idx INTEGER NOT NULL,
+    question TEXT NOT NULL,
+    scores TEXT NOT NULL,
+    usage TEXT NOT NULL,
+    PRIMARY KEY (run_id, idx)
+);
+CREATE INDEX IF NOT EXISTS runs_name ON runs(name, created_at);
+"""
+
+
+def connect(path: str = REGISTRY_PATH) -> sqlite3.Connection:
+    """스키마가 적용된 연결 (호출자가 close해야 함: `with connect()`는 커밋만 하고 닫지 않음)"""
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(_SCHEMA)
+    return conn
+
+def _number(value) -> Optional[float]:
+    """숫자로 변환 가능한 값만 float으로 (NaN / 빈 값은 None)"""
+    if isinstance(value, bool) or value is None:
+        return None
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(value) else value
+
+def mean(values: List[Optional[float]]) -> Optional[float]:
+    values = [v for v in values if v is not None]
+    return sum(values) / len(values) if values else None
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=server_dir, capture_output=True, text=True, timeout=5
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+def run_config(**extra) -> dict:
+    """실행 환경 설정: 모델, provider, 인덱스 위치, git 커밋 + 호출자가 넘긴 값"""
+    from providers import current_provider
+    from service import LLM_MODEL, EMBEDDING_MODEL, CHROMA_DB_DIR
+
+    return {
+        "llm_model": LLM_MODEL,
+        "embedding_model": EMBEDDING_MODEL,
+        "provider": current_provider(),
+        "eval_provider": os.environ.get("RAG_EVAL_PROVIDER"),
+        "index_mode": os.environ.get("RAG_INDEX_MODE", "single"),
+        "chroma_db_dir": CHROMA_DB_DIR,
+        "git_commit": _git_commit(),
+        **extra,
+    }
+
+def split_row(row: dict):
+    """결과 행 -> (질문, 메트릭 점수 dict, 사용량 dict)"""
+    question = next((str(row[c]) for c in QUESTION_COLUMNS if row.get(c)), "")
+    usage = {col: _number(row.get(col)) for col in USAGE_COLUMNS}
+    scores = {}
+    for key, value in row.items():
+        if key in TEXT_COLUMNS or key in USAGE_COLUMNS:
+            continue
+        number = _number(value)
+        if number is not None:
+            scores[key] = number
+    return question, scores, usage
+
+def summarize_rows(rows: List[dict]) -> dict:
+    """메트릭 / 사용량 컬럼별 평균"""
+    metrics = sorted({k for row in rows for k in row["scores"]})
+    summary = {"questions": len(rows)}
+    for key in metrics:
+        summary[key] = mean([row["scores"].get(key) for row in rows])
+    for key in USAGE_COLUMNS:
+        summary[key] = mean([row["usage"].get(key) for row in rows])
+    return summary
+
+def record_run(name: str, result_rows: List[dict], config: Optional[dict] = None, path: str = REGISTRY_PATH) -> str:
+    """평가 결과 행(results_df.to_dict("records"))을 새 실행으로 등록하고 run_id 반환"""
+    rows = []
+    for row in result_rows:
+        question, scores, usage = split_row(row)
+        rows.append({"question": question, "scores": scores, "usage": usage})
+
+    run_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+    with closing(connect(path)) as conn, conn:
+        conn.execute(
+            "INSERT INTO runs (run_id, name, created_at, config, summary) VALUES (?, ?, ?, ?, ?)",
+            (run_id, name, time.time(), json.dumps(config or {}, ensure_ascii=False),
+             json.dumps(summarize_rows(rows), ensure_ascii=False))
+        )
+        conn.executemany(
+            "INSERT INTO run_rows (run_id, idx, question, scores, usage) VALUES (?, ?, ?, ?, ?)",
+            [(run_id, i, r["question"], json.dumps(r["scores"]), json.dumps(r["usage"])) for i, r in enumerate(rows)]
+        )
+    return run_id
+
+def resolve_run_id(conn: sqlite3.Connection, ref: str) -> str:
+    """run_id / 실행 이름(가장 최근) / latest -> run_id"""
+    if ref == "latest":
+        row = conn.execute("SELECT run_id FROM runs ORDER BY created_at DESC LIMIT 1").fetchone()
+    else:
+        row = conn.execute("SELECT run_id FROM runs WHERE run_id = ?", (ref,)).fetchone()
+        if row is None:
+            row = conn.execute(
+                "SELECT run_id FROM runs WHERE name = ? ORDER BY created_at DESC LIMIT 1", (ref,)
+            ).fetchone()
+    if row is None:
+        raise KeyError(f"등록된 실행을 찾을 수 없습니다: {ref}")
+    return row["run_id"]
+
+def load_run(ref: str, path: str = REGISTRY_PATH) -> dict:
+    """실행 메타데이터와 질문별 행 로드"""
+    with closing(connect(path)) as conn:
+        run_id = resolve_run_id(conn, ref)
+        run = conn.execute("SELECT * FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        rows = conn.execute(
+            "SELECT question, scores, usage FROM run_rows WHERE run_id = ? ORDER BY idx", (run_id,)
+        ).fetchall()
+    return {
+        "run_id": run["run_id"],
+        "name": run["name"],
+        "created_at": run["created_at"],
+        "config": json.loads(run["config"]),
+        "summary": json.loads(run["summary"]),
+        "rows": [
+            {"question": r["question"], "scores": json.loads(r["scores"]), "usage": json.loads(r["usage"])}
+            for r in rows
+        ],
+    }
+
+def list_runs(limit: int = 20, path: str = REGISTRY_PATH) -> List[dict]:
+    with closing(connect(path)) as conn:
+        rows = conn.execute(
+            "SELECT run_id, name, created_at, summary FROM runs ORDER BY created_at DESC LIMIT ?", (limit,)
+        ).fetchall()
+    return [
+        {"run_id": r["run_id"], "name": r["name"], "created_at": r["created_at"], "summary": json.loads(r["summary"])}
+        for r in rows
+    ]
+
+def _fmt(value) -> str:
+    if value is None:
+        return "-"
+    return f"{value:.4g}" if isinstance(value, float) else str(value)
+
+def main():
+    parser = argparse.ArgumentParser(description="평가 실행 레지스트리")
+    sub = parser.add_subparsers(dest="command", required=True)
+    list_parser = sub.add_parser("list", help="최근 실행 목록")
+    list_parser.add_argument("--limit", type=int, default=20)
+    show_parser = sub.add_parser("show", help="실행 설정과 요약")
+    show_parser.add_argument("run")
+    import_parser = sub.add_parser("import", help="기존 평가 결과 CSV 등록")
+    import_parser.add_argument("csv")
+    import_parser.add_argument("--name", required=True)
+    import_parser.add_argument("--pipeline", help="config에 기록할 파이프라인 이름")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        for run in list_runs(args.limit):
+            created = time.strftime("%Y-%m-%d %H:%M", time.localtime(run["created_at"]))
+            summary = ", ".join(f"{k}={_fmt(v)}" for k, v in run["summary"].items() if v is not None)
+            print(f"{run['run_id']}  {created}  {run['name']:<24} {summary}")
+    elif args.command == "show":
+        run = load_run(args.run)
+        print(json.dumps({k: v for k, v in run.items() if k != "rows"}, ensure_ascii=False, indent=2))
+    elif args.command == "import":
+        import pandas as pd
+
+        rows = pd.read_csv(args.csv).to_dict("records")
+        run_id = record_run(args.name, rows, {"source_csv": os.path.abspath(args.csv), "pipeline": args.pipeline})
+        print(f"Registered {len(rows)} rows as run {run_id}")
+
+if __name__ == "__main__":
+    main()
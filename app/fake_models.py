@@ -0,0 +1,195 @@
+"""
+네트워크 없이 동작하는 결정적 로컬 대체 모델 (RAG_PROVIDER=fake).
+
+부하 테스트 / 회귀 테스트 / CI에서 검색, 그래프 오버헤드, 서버 처리량을 외부 API 없이 측정하기 위한 용도이며
+답변 품질은 의미가 없습니다.
+"""
+import re
+import json
+import time
+import uuid
+import random
+import hashlib
+import threading
+from typing import Any, List, Optional
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import PrivateAttr
+
+from message_pruning import parse_tool_content
+
+NOT_FOUND_ANSWER = "제공된 문서에서 답변을 찾을 수 없습니다."
+
+_WORD = re.compile(r"\w+")
+
+
+class FakeProviderError(RuntimeError):
+    """FAKE_ERROR_RATE로 주입된 오류"""
+
+
+class FaultInjector:
+    """호출마다 고정 지연을 주고, error_rate 확률로 FakeProviderError 발생"""
+    def __init__(self, latency_ms: float = 0.0, error_rate: float = 0.0, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def __call__(self, kind: str):
+        if self.latency_ms > 0:
+            time.sleep(self.latency_ms / 1000)
+        if self.error_rate > 0:
+            with self._lock:
+                failed = self._rng.random() < self.error_rate
+            if failed:
+                raise FakeProviderError(f"injected {kind} failure")
+
+
+# --- Embeddings ---
+
+class HashEmbeddings(Embeddings):
+    """
+    단어 + 글자 3-gram 해싱 기반 결정적 임베딩.
+    같은 텍스트는 항상 같은 벡터, 어휘가 겹치는 텍스트는 코사인 유사도가 높음.
+    """
+    def __init__(self, dim: int = 256, latency_ms: float = 0.0, error_rate: float = 0.0, seed: int = 0):
+        self.dim = dim
+        self.faults = FaultInjector(latency_ms, error_rate, seed)
+
+    def _features(self, text: str) -> List[str]:
+        words = _WORD.findall(text.lower())
+        features = list(words)
+        for word in words:
+            padded = f"#{word}#"
+            features.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+        return features
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dim
+        for feature in self._features(text):
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            vector[value % self.dim] += 1.0 if (value >> 63) & 1 else -1.0
+        norm = sum(v * v for v in vector) ** 0.5
+        if norm == 0:
+            return vector
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.faults("embedding")
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        self.faults("embedding")
+        return self._embed(text)
+
+
+# --- Chat ---
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    도구가 바인딩되어 있으면 에이전트 그래프의 정해진 순서대로 도구를 호출하고,
+    그 외에는 문맥(Context)의 앞부분을 답변으로 돌려주는 스크립트 모델.
+
+    1. search_child_chunks(query=질문)
+    2. retrieve_parent_chunks(parent_ids=직전 검색 결과 상위 max_parent_ids개) - retrieve_parents=True일 때
+    3. 1~2를 max_searches번 반복한 뒤 최종 답변
+    """
+    latency_ms: float = 0.0
+    error_rate: float = 0.0
+    seed: int = 0
+    max_searches: int = 1
+    retrieve_parents: bool = True
+    max_parent_ids: int = 2
+    answer_chars: int = 300
+
+    _faults: FaultInjector = PrivateAttr()
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._faults = FaultInjector(self.latency_ms, self.error_rate, self.seed)
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-fake"
+
+    def bind_tools(self, tools, **kwargs):
+        from langchain_core.utils.function_calling import convert_to_openai_tool
+
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], **kwargs)
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> ChatResult:
+        self._faults("chat")
+
+        tool_names = {t["function"]["name"] for t in kwargs.get("tools") or []}
+        message = self._next_tool_call(messages, tool_names) or self._answer(messages)
+
+        prompt_tokens = sum(_estimate_tokens(str(m.content)) for m in messages)
+        completion_tokens = _estimate_tokens(str(message.content) or json.dumps(message.tool_calls, ensure_ascii=False))
+        message.usage_metadata = {
+            "input_tokens": prompt_tokens,
+            "output_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _next_tool_call(self, messages: List[BaseMessage], tool_names: set) -> Optional[AIMessage]:
+        if not tool_names:
+            return None
+
+        last_human = max((i for i, m in enumerate(messages) if isinstance(m, HumanMessage)), default=-1)
+        if last_human < 0:
+            return None
+        query = str(messages[last_human].content)
+        turn = messages[last_human + 1:]
+
+        calls = [call for m in turn if isinstance(m, AIMessage) for call in m.tool_calls]
+        searches = sum(1 for call in calls if call["name"] == "search_child_chunks")
+        parent_lookups = sum(1 for call in calls if call["name"] == "retrieve_parent_chunks")
+
+        # 직전 검색 결과의 부모 청크를 먼저 가져온 뒤 다음 검색 (search -> parent -> search -> parent ...)
+        last_tool = next((m for m in reversed(turn) if isinstance(m, ToolMessage)), None)
+        if ("retrieve_parent_chunks" in tool_names and self.retrieve_parents
+                and last_tool is not None and last_tool.name == "search_child_chunks" and parent_lookups < searches):
+            results = parse_tool_content(last_tool.content)
+            parent_ids = []
+            if isinstance(results, list):
+                parent_ids = [r["parent_id"] for r in results if isinstance(r, dict) and r.get("parent_id")]
+            parent_ids = list(dict.fromkeys(parent_ids))[:self.max_parent_ids]
+            if parent_ids:
+                return self._tool_call("retrieve_parent_chunks", {"parent_ids": parent_ids})
+
+        if "search_child_chunks" in tool_names and searches < self.max_searches:
+            return self._tool_call("search_child_chunks", {"query": query})
+        return None
+
+    def _tool_call(self, name: str, args: dict) -> AIMessage:
+        return AIMessage(
+            content="",
+            tool_calls=[{"name": name, "args": args, "id": f"call_{uuid.uuid4().hex[:12]}", "type": "tool_call"}]
+        )
+
+    def _answer(self, messages: List[BaseMessage]) -> AIMessage:
+        context = ""
+        tool_messages = [m for m in messages if isinstance(m, ToolMessage)]
+        if tool_messages:
+            results = parse_tool_content(tool_messages[-1].content)
+            if isinstance(results, list):
+                context = " ".join(r.get("content", "") if isinstance(r, dict) else str(r) for r in results)
+            else:
+                context = str(results)
+        elif messages:
+            # SimpleRAG 프롬프트: "... Context: {context} Question: {input} ..."
+            prompt = str(messages[-1].content)
+            if "Context:" in prompt:
+                context = prompt.split("Context:", 1)[1].split("Question:", 1)[0]
+
+        context = " ".join(context.split())
+        return AIMessage(content=context[:self.answer_chars] if context else NOT_FOUND_ANSWER)
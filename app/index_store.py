@@ -0,0 +1,221 @@
+"""
+인덱스 세대(generation) 관리 - 멀티 워커 모드용.
+
+RAG_INDEX_MODE
+- single (기본): CHROMA_DB_DIR / PARENT_STORE_DIR를 그대로 읽고 씀 (단일 프로세스)
+- generations: INDEX_DIR/generations/<id>/ 아래에 세대별 인덱스를 두고, INDEX_DIR/CURRENT가 현재 세대를 가리킴
+  - 쓰기: 파일 락으로 단일 writer 보장 → 현재 세대를 복사한 새 세대에 기록 → CURRENT를 원자적으로 교체
+    (/ingest 한 번마다 현재 세대 전체(Chroma + 부모 청크)를 복사하므로 쓰기 비용과 일시적 디스크 사용량이 인덱스 크기에 비례)
+  - 읽기: chromadb는 클라이언트를 열기만 해도 chroma.sqlite3에 기록하고, 세그먼트를 로드할 때마다 HNSW 파일(length.bin 등)을
+    다시 저장하므로 게시된 세대를 여러 프로세스가 직접 열면 같은 파일을 조정 없이 덮어씀.
+    그래서 각 reader 프로세스는 세대의 chroma 디렉토리를 INDEX_DIR/readers/<pid>/<세대>/로 복사해 자기 사본만 열고
+    (reader_dir), 게시된 세대는 writer가 게시한 뒤 바이트 단위로 변하지 않음. 부모 청크(json)는 읽기만 하므로 복사하지 않음.
+    CURRENT를 INDEX_POLL_SEC 간격으로 확인해 재시작 없이 새 세대로 전환
+
+게시된 세대가 reader 이후에도 그대로인지 확인:
+
+    RAG_INDEX_MODE=generations python index_store.py check
+"""
+import os
+import time
+import uuid
+import shutil
+import threading
+from contextlib import contextmanager
+from typing import Optional, Tuple
+
+INDEX_MODE = os.environ.get("RAG_INDEX_MODE", "single")
+INDEX_DIR = os.environ.get("INDEX_DIR", "./index")
+INDEX_POLL_SEC = float(os.environ.get("INDEX_POLL_SEC", "1.0"))
+# 이전 세대를 아직 열고 있는 reader가 있을 수 있으므로 최근 몇 세대는 남겨둠
+KEEP_GENERATIONS = int(os.environ.get("INDEX_KEEP_GENERATIONS", "3"))
+
+_GENERATIONS_DIR = os.path.join(INDEX_DIR, "generations")
+_READERS_DIR = os.path.join(INDEX_DIR, "readers")
+_CURRENT_FILE = os.path.join(INDEX_DIR, "CURRENT")
+_LOCK_FILE = os.path.join(INDEX_DIR, "writer.lock")
+
+_current_lock = threading.Lock()
+_current_cache = {"generation": None, "checked_at": 0.0}
+_writer_lock = threading.Lock()
+
+
+def generations_enabled() -> bool:
+    return INDEX_MODE == "generations"
+
+def generation_dirs(generation: str) -> Tuple[str, str]:
+    """세대 ID -> (chroma 디렉토리, 부모 청크 디렉토리)"""
+    base = os.path.join(_GENERATIONS_DIR, generation)
+    return os.path.join(base, "chroma_db"), os.path.join(base, "parent_store")
+
+def _read_current() -> Optional[str]:
+    try:
+        with open(_CURRENT_FILE, "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+def current_generation(force: bool = False) -> Optional[str]:
+    """현재 게시된 세대 ID (INDEX_POLL_SEC 동안 캐시). 아직 게시된 세대가 없으면 None"""
+    now = time.monotonic()
+    with _current_lock:
+        if force or now - _current_cache["checked_at"] >= INDEX_POLL_SEC:
+            _current_cache["generation"] = _read_current()
+            _current_cache["checked_at"] = now
+        return _current_cache["generation"]
+
+def _publish(generation: str):
+    tmp_path = f"{_CURRENT_FILE}.{uuid.uuid4().hex[:8]}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(generation)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, _CURRENT_FILE)
+    current_generation(force=True)
+
+def _collect_garbage(keep: str):
+    generations = sorted(
+        (name for name in os.listdir(_GENERATIONS_DIR) if name != keep),
+        reverse=True
+    )
+    for name in generations[KEEP_GENERATIONS - 1:]:
+        shutil.rmtree(os.path.join(_GENERATIONS_DIR, name), ignore_errors=True)
+
+# --- Reader copies ---
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def _collect_reader_garbage():
+    """종료된 프로세스의 reader 사본 삭제"""
+    if not os.path.isdir(_READERS_DIR):
+        return
+    for name in os.listdir(_READERS_DIR):
+        if name.isdigit() and int(name) != os.getpid() and not _pid_alive(int(name)):
+            shutil.rmtree(os.path.join(_READERS_DIR, name), ignore_errors=True)
+
+def reader_dir(chroma_dir: str) -> str:
+    """
+    읽기용으로 열 chroma 디렉토리. 게시된 세대면 이 프로세스 전용 사본 경로를 반환 (없으면 복사),
+    그 외(아직 세대가 없을 때의 기존 디렉토리, 벤치마크용 임시 디렉토리)는 그대로 반환
+    """
+    generation_root = os.path.dirname(os.path.abspath(chroma_dir))
+    if os.path.dirname(generation_root) != os.path.abspath(_GENERATIONS_DIR):
+        return chroma_dir
+
+    process_dir = os.path.join(_READERS_DIR, str(os.getpid()))
+    local_dir = os.path.join(process_dir, os.path.basename(generation_root), "chroma_db")
+    if not os.path.isdir(local_dir):
+        if not os.path.isdir(process_dir):
+            _collect_reader_garbage()
+        # 복사 도중 실패한 사본이 보이지 않도록 임시 경로에 복사한 뒤 rename
+        tmp_dir = f"{local_dir}.{uuid.uuid4().hex[:8]}.tmp"
+        shutil.copytree(chroma_dir, tmp_dir)
+        os.rename(tmp_dir, local_dir)
+    return local_dir
+
+def release_reader_dir(local_dir: str):
+    """reader_dir가 만든 사본 삭제 (클라이언트를 닫은 뒤 호출). 사본이 아니면 아무것도 하지 않음"""
+    if os.path.abspath(local_dir).startswith(os.path.abspath(_READERS_DIR) + os.sep):
+        shutil.rmtree(os.path.dirname(local_dir), ignore_errors=True)
+
+# --- Writer ---
+
+@contextmanager
+def _exclusive_writer():
+    """프로세스 내 스레드 + 프로세스 간(fcntl) 쓰기 락"""
+    import fcntl
+
+    os.makedirs(INDEX_DIR, exist_ok=True)
+    with _writer_lock, open(_LOCK_FILE, "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+@contextmanager
+def new_generation(seed_dirs: Tuple[str, str], copy_current: bool = True):
+    """
+    새 세대 디렉토리를 만들어 (chroma 디렉토리, 부모 청크 디렉토리)를 yield하고,
+    블록이 정상 종료되면 현재 세대로 게시. 예외가 나면 새 세대는 버려짐.
+
+    seed_dirs: 아직 게시된 세대가 없을 때 복사해 올 기존(single 모드) 인덱스 디렉토리
+    copy_current: False면 빈 세대에서 시작 (전체 재구축용)
+    """
+    with _exclusive_writer():
+        # 세대 ID는 문자열 정렬이 곧 생성 순서가 되도록 나노초 타임스탬프로 시작
+        generation = f"{time.time_ns():020d}-{uuid.uuid4().hex[:6]}"
+        chroma_dir, parent_dir = generation_dirs(generation)
+
+        base = current_generation(force=True)
+        src_chroma, src_parent = generation_dirs(base) if base else seed_dirs
+        if copy_current and os.path.isdir(src_chroma):
+            shutil.copytree(src_chroma, chroma_dir)
+        if copy_current and os.path.isdir(src_parent):
+            shutil.copytree(src_parent, parent_dir)
+        os.makedirs(chroma_dir, exist_ok=True)
+        os.makedirs(parent_dir, exist_ok=True)
+
+        try:
+            yield chroma_dir, parent_dir
+        except BaseException:
+            shutil.rmtree(os.path.dirname(chroma_dir), ignore_errors=True)
+            raise
+
+        _publish(generation)
+        _collect_garbage(keep=generation)
+
+
+def _digests(root: str) -> dict:
+    import hashlib
+
+    digests = {}
+    for dirpath, _, files in os.walk(root):
+        for name in files:
+            path = os.path.join(dirpath, name)
+            with open(path, "rb") as f:
+                digests[os.path.relpath(path, root)] = hashlib.sha256(f.read()).hexdigest()
+    return digests
+
+def check_readers_leave_generation_unchanged(readers: int = 2) -> bool:
+    """
+    현재 세대를 별도 reader 프로세스에서 열어 검색한 뒤, 게시된 세대 파일이 바이트 단위로 그대로인지 확인
+    """
+    import sys
+    import subprocess
+
+    generation = current_generation(force=True)
+    if generation is None:
+        print("게시된 세대가 없습니다. 먼저 문서를 적재하세요.")
+        return False
+    root = os.path.dirname(generation_dirs(generation)[0])
+    before = _digests(root)
+    server_dir = os.path.dirname(os.path.abspath(__file__))
+    script = (
+        f"import sys; sys.path.insert(0, {server_dir!r})\n"
+        "import service; service.get_vectorstore().similarity_search('index check', k=1)"
+    )
+    for _ in range(readers):
+        subprocess.run([sys.executable, "-c", script], check=True)
+    after = _digests(root)
+    changed = sorted(path for path in set(before) | set(after) if before.get(path) != after.get(path))
+    if changed:
+        print(f"세대 {generation}: reader가 파일을 변경했습니다: {', '.join(changed)}")
+        return False
+    print(f"세대 {generation}: reader {readers}개 실행 후 {len(before)}개 파일이 그대로입니다.")
+    return True
+
+if __name__ == "__main__":
+    import sys
+
+    if sys.argv[1:] != ["check"]:
+        print("usage: RAG_INDEX_MODE=generations python index_store.py check")
+        sys.exit(2)
+    sys.exit(0 if check_readers_leave_generation_unchanged() else 1)
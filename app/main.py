@@ -1,12 +1,42 @@
+import os
+import threading
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
-from router import router
 
-# 환경 변수 로드 (.env 파일)
+# 환경 변수 로드 (.env 파일) - 모듈들이 import 시점에 설정을 읽으므로 가장 먼저
 load_dotenv()
 
-app = FastAPI(title="RAG API 서비스", description="RAG 기반 PDF 채팅을 위한 API")
+from router import router, warmup_enabled, warmup_pipelines
+from accounting import report_usage_periodically
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 파이프라인은 백그라운드에서 생성: 그동안 /health/live는 즉시 응답하고 /health/ready는 503
+    if warmup_enabled():
+        threading.Thread(target=warmup_pipelines, name="pipeline-warmup", daemon=True).start()
+
+    # 알려진 질문 세트(dataset/evals.jsonl, evals/questions.jsonl)의 질의 임베딩을 미리 캐시
+    if os.environ.get("EMBEDDING_CACHE_WARMUP", "false").lower() in ("1", "true", "yes"):
+        from embedding_cache import warmup_query_cache
+        threading.Thread(target=warmup_query_cache, name="embedding-cache-warmup", daemon=True).start()
+
+    # 라우트별 사용량 주기 리포트 (USAGE_REPORT_INTERVAL_SEC=0이면 비활성화)
+    stop_event = threading.Event()
+    interval = float(os.environ.get("USAGE_REPORT_INTERVAL_SEC", "300"))
+    if interval > 0:
+        threading.Thread(
+            target=report_usage_periodically,
+            args=(interval, stop_event, os.environ.get("USAGE_REPORT_PATH")),
+            name="usage-report",
+            daemon=True
+        ).start()
+    yield
+    stop_event.set()
+
+app = FastAPI(title="RAG API 서비스", description="RAG 기반 PDF 채팅을 위한 API", lifespan=lifespan)
 
 # CORS 설정
 app.add_middleware(
@@ -20,6 +50,46 @@ app.add_middleware(
 # 라우터 등록
 app.include_router(router)
 
+def run_multi_worker(host: str, port: int, workers: int, writer_port: int):
+    """
+    멀티 워커 모드: 읽기 전용 query 워커 N개 + 적재 전담 writer 프로세스 1개.
+    인덱스는 세대(generation) 단위로 게시되고, 각 워커는 현재 세대의 chroma 디렉토리를 자기 사본으로 복사해 읽음 (index_store.py 참고)
+    """
+    import sys
+    import subprocess
+    import uvicorn
+
+    # 자식 프로세스(uvicorn 워커, writer)는 환경 변수를 상속하므로 import 전에 설정
+    os.environ["RAG_INDEX_MODE"] = "generations"
+    os.environ["RAG_WRITER_URL"] = f"http://{host}:{writer_port}"
+
+    writer_env = {**os.environ, "RAG_ROLE": "writer", "RAG_WARMUP_ON_STARTUP": "false"}
+    writer = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", host, "--port", str(writer_port)],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=writer_env
+    )
+    print(f"writer 프로세스 시작 (pid={writer.pid}, port={writer_port})")
+
+    os.environ["RAG_ROLE"] = "query"
+    try:
+        uvicorn.run("main:app", host=host, port=port, workers=workers)
+    finally:
+        writer.terminate()
+        writer.wait(timeout=10)
+
 if __name__ == "__main__":
+    import argparse
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+
+    parser = argparse.ArgumentParser(description="RAG API 서버")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1, help="2 이상이면 멀티 워커 모드 (query 워커 N개 + writer 1개)")
+    parser.add_argument("--writer-port", type=int, default=8001, help="멀티 워커 모드의 writer 프로세스 포트 (/ingest, /rechunk)")
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        run_multi_worker(args.host, args.port, args.workers, args.writer_port)
+    else:
+        uvicorn.run(app, host=args.host, port=args.port)
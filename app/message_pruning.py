@@ -0,0 +1,103 @@
+"""
+에이전트 메시지 히스토리 정리(pruning).
+
+AgenticRAG는 매 스텝마다 전체 메시지를 LLM에 다시 보내므로, 도구 결과가 쌓일수록 스텝당 프롬프트가 커집니다.
+prune_messages는 가장 최근 도구 라운드를 제외한 이전 도구 결과를 다음과 같이 줄입니다.
+
+- search_child_chunks: 이후 retrieve_parent_chunks로 부모 청크를 가져온 항목은 본문 없이 출처(citation)만 남기고,
+  나머지는 앞부분 snippet_chars 글자만 유지
+- retrieve_parent_chunks: 같은 parent_id를 나중에 다시 가져왔으면 이전 것은 출처만 남김
+
+ToolMessage 자체는 지우지 않고 내용만 바꿉니다 (tool_call과 ToolMessage 짝이 맞아야 LLM API가 받아줌).
+"""
+import ast
+import json
+from typing import Annotated, Any, List, TypedDict
+
+from langchain_core.messages import AIMessage, AnyMessage, ToolMessage
+from langgraph.graph.message import add_messages
+
+PRUNED_SNIPPET_CHARS = 200
+
+
+def parse_tool_content(content: Any):
+    """ToolNode가 직렬화한 도구 결과(JSON 또는 Python literal)를 복원"""
+    if not isinstance(content, str):
+        return content
+    try:
+        return json.loads(content)
+    except ValueError:
+        pass
+    try:
+        return ast.literal_eval(content)
+    except (ValueError, SyntaxError):
+        return content
+
+def _last_round_start(messages: List[AnyMessage]) -> int:
+    """마지막 도구 호출 AIMessage의 인덱스 (그 이후가 가장 최근 도구 라운드)"""
+    for i in range(len(messages) - 1, -1, -1):
+        msg = messages[i]
+        if isinstance(msg, AIMessage) and msg.tool_calls:
+            return i
+    return len(messages)
+
+def _citation(res: dict) -> dict:
+    return {"parent_id": res.get("parent_id"), "source": res.get("source", "unknown")}
+
+def prune_messages(messages: List[AnyMessage], snippet_chars: int = PRUNED_SNIPPET_CHARS) -> List[AnyMessage]:
+    """가장 최근 도구 라운드 이전의 도구 결과를 출처/요약 형태로 축소한 메시지 목록 반환"""
+    boundary = _last_round_start(messages)
+
+    # 부모 청크를 가져온 parent_id와, 각 parent_id를 마지막으로 가져온 메시지 위치
+    latest_parent_fetch = {}
+    for i, msg in enumerate(messages):
+        if isinstance(msg, ToolMessage) and msg.name == "retrieve_parent_chunks":
+            results = parse_tool_content(msg.content)
+            if isinstance(results, list):
+                for res in results:
+                    if isinstance(res, dict) and res.get("parent_id"):
+                        latest_parent_fetch[res["parent_id"]] = i
+
+    pruned = []
+    for i, msg in enumerate(messages):
+        if i >= boundary or not isinstance(msg, ToolMessage):
+            pruned.append(msg)
+            continue
+
+        results = parse_tool_content(msg.content)
+        if not isinstance(results, list):
+            pruned.append(msg)
+            continue
+
+        compact = []
+        for res in results:
+            if not isinstance(res, dict):
+                compact.append(str(res)[:snippet_chars])
+                continue
+            parent_id = res.get("parent_id")
+            if msg.name == "search_child_chunks":
+                if parent_id in latest_parent_fetch:
+                    compact.append(_citation(res))
+                else:
+                    compact.append({**_citation(res), "content": res.get("content", "")[:snippet_chars]})
+            elif msg.name == "retrieve_parent_chunks" and latest_parent_fetch.get(parent_id, i) > i:
+                compact.append(_citation(res))
+            else:
+                compact.append(res)
+
+        pruned.append(ToolMessage(
+            content=json.dumps(compact, ensure_ascii=False),
+            tool_call_id=msg.tool_call_id,
+            name=msg.name,
+            id=msg.id
+        ))
+    return pruned
+
+def add_and_prune_messages(left: List[AnyMessage], right: List[AnyMessage]) -> List[AnyMessage]:
+    """add_messages 후 prune_messages를 적용하는 상태 reducer"""
+    return prune_messages(add_messages(left, right))
+
+
+class PrunedMessagesState(TypedDict):
+    """MessagesState와 같지만 도구 결과가 쌓일 때마다 이전 라운드를 정리"""
+    messages: Annotated[List[AnyMessage], add_and_prune_messages]
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List
+from typing import Any, Dict, List, Optional
 
 class ChatRequest(BaseModel):
     query: str = Field(..., description="사용자의 질문", example="이 문서의 주요 내용이 뭐야?")
@@ -9,13 +9,62 @@ class SourceInfo(BaseModel):
     page: int = Field(..., description="페이지 번호 (PDF 등)")
     content: str = Field(..., description="참고한 문서의 내용 일부")
 
+class RechunkRequest(BaseModel):
+    strategy: str = Field("header_recursive", description="청킹 전략 이름 (header_recursive/token/sentence_window/semantic)")
+    chunk_size: Optional[int] = Field(None, gt=0, description="자식 청크 최대 길이 (미지정 시 전략 기본값)")
+    chunk_overlap: Optional[int] = Field(None, ge=0, description="자식 청크 간 중첩 길이 (미지정 시 전략 기본값)")
+    header_levels: Optional[int] = Field(None, ge=1, le=6, description="부모 청크 분할에 사용할 Markdown 헤더 단계 수")
+    params: Dict[str, Any] = Field(default={}, description="전략별 추가 파라미터 (예: window_size, breakpoint_percentile)")
+
+    def strategy_params(self) -> Dict[str, Any]:
+        """지정된 값만 전략 파라미터로 전달"""
+        params = dict(self.params)
+        for name in ("chunk_size", "chunk_overlap", "header_levels"):
+            value = getattr(self, name)
+            if value is not None:
+                params[name] = value
+        return params
+
+class RechunkResponse(BaseModel):
+    status: str = Field(..., description="처리 상태 (success/error)")
+    documents_count: int = Field(..., description="재청킹된 문서 개수")
+    chunks_count: int = Field(..., description="생성된 자식 청크 개수")
+    elapsed_seconds: float = Field(..., description="재청킹 소요 시간 (초)")
+    message: str = Field(..., description="처리 결과 메시지")
+
+class UsageInfo(BaseModel):
+    llm_calls: int = Field(..., description="LLM 호출 횟수")
+    prompt_tokens: int = Field(..., description="프롬프트(입력) 토큰 수")
+    completion_tokens: int = Field(..., description="생성(출력) 토큰 수")
+    total_tokens: int = Field(..., description="전체 토큰 수")
+    embedding_calls: int = Field(..., description="임베딩 API 호출 횟수")
+    embedded_texts: int = Field(..., description="임베딩한 텍스트 개수")
+    tool_calls: Dict[str, int] = Field(default={}, description="도구별 호출 횟수")
+    budget_exhausted: bool = Field(False, description="요청 예산 소진으로 에이전트 루프를 조기 종료했는지 여부")
+    latency_ms: float = Field(..., description="파이프라인 처리 시간 (ms)")
+
+class RoutingInfo(BaseModel):
+    route: str = Field(..., description="최종 답변을 생성한 파이프라인 (simple/agentic)")
+    reason: str = Field(..., description="라우팅 사유 (confident/unanswerable/no_documents/low_retrieval_score)")
+    top_score: Optional[float] = Field(None, description="SimpleRAG 최상위 검색 결과의 코사인 유사도")
+    mean_score: Optional[float] = Field(None, description="SimpleRAG 검색 결과 코사인 유사도 평균")
+    unanswerable: bool = Field(False, description="SimpleRAG가 답변 불가 폴백을 냈는지 여부")
+
 class ChatResponse(BaseModel):
     answer: str = Field(..., description="LLM이 생성한 답변")
     sources: List[SourceInfo] = Field(..., description="답변 생성에 사용된 출처 목록")
     contexts: List[str] = Field(default=[], description="검색된 문서의 전체 내용 (RAGAS 평가용)")
+    usage: Optional[UsageInfo] = Field(None, description="요청이 소비한 토큰/호출 수")
+    routing: Optional[RoutingInfo] = Field(None, description="/chat 라우팅 결정 (적응형 엔드포인트에서만)")
 
 class IngestResponse(BaseModel):
-    status: str = Field(..., description="처리 상태 (success/error)")
+    status: str = Field(..., description="처리 상태 (success/duplicate/error)")
     filename: str = Field(..., description="처리된 파일명")
     chunks_count: int = Field(..., description="생성된 청크(Chunk) 개수")
     message: str = Field(..., description="처리 결과 메시지")
+    sha256: Optional[str] = Field(None, description="업로드 파일의 SHA-256 해시 (내용 주소 저장 키)")
+
+class HealthResponse(BaseModel):
+    status: str = Field(..., description="상태 (ok/ready/starting)")
+    pipelines: Dict[str, bool] = Field(..., description="파이프라인별 초기화 완료 여부")
+    errors: Dict[str, str] = Field(default={}, description="초기화에 실패한 파이프라인의 오류 메시지")
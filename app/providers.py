@@ -0,0 +1,92 @@
+"""
+LLM / 임베딩 백엔드 선택.
+
+RAG_PROVIDER 환경 변수로 백엔드를 고릅니다.
+- google (기본): ChatGoogleGenerativeAI / GoogleGenerativeAIEmbeddings
+- fake: 네트워크 없이 동작하는 결정적(deterministic) 로컬 대체 모델 (fake_models.py)
+  FAKE_LATENCY_MS, FAKE_ERROR_RATE, FAKE_SEED로 지연/오류 주입, FAKE_MAX_SEARCHES로 에이전트 검색 횟수 지정
+"""
+import os
+from typing import Callable, Dict, Optional
+
+DEFAULT_PROVIDER = "google"
+
+CHAT_PROVIDERS: Dict[str, Callable] = {}
+EMBEDDING_PROVIDERS: Dict[str, Callable] = {}
+
+
+def register_chat_provider(name: str):
+    """채팅 모델 백엔드 등록 데코레이터"""
+    def decorator(func: Callable) -> Callable:
+        CHAT_PROVIDERS[name] = func
+        return func
+    return decorator
+
+def register_embedding_provider(name: str):
+    """임베딩 모델 백엔드 등록 데코레이터"""
+    def decorator(func: Callable) -> Callable:
+        EMBEDDING_PROVIDERS[name] = func
+        return func
+    return decorator
+
+def current_provider() -> str:
+    """RAG_PROVIDER 값 (.env가 import 이후에 로드될 수 있으므로 호출 시점에 읽음)"""
+    return os.environ.get("RAG_PROVIDER", DEFAULT_PROVIDER)
+
+def _lookup(registry: Dict[str, Callable], provider: Optional[str], kind: str) -> Callable:
+    name = provider or current_provider()
+    if name not in registry:
+        available = ", ".join(sorted(registry))
+        raise ValueError(f"알 수 없는 {kind} provider입니다: {name} (사용 가능: {available})")
+    return registry[name]
+
+def get_chat_model(model: str, temperature: float = 0, provider: Optional[str] = None):
+    """설정된 provider의 채팅 모델 인스턴스 반환"""
+    return _lookup(CHAT_PROVIDERS, provider, "chat")(model=model, temperature=temperature)
+
+def get_embedding_model(model: str, provider: Optional[str] = None):
+    """설정된 provider의 임베딩 모델 인스턴스 반환"""
+    return _lookup(EMBEDDING_PROVIDERS, provider, "embedding")(model=model)
+
+
+# --- Google ---
+
+@register_chat_provider("google")
+def _google_chat(model: str, temperature: float):
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    return ChatGoogleGenerativeAI(model=model, temperature=temperature)
+
+@register_embedding_provider("google")
+def _google_embeddings(model: str):
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+    return GoogleGenerativeAIEmbeddings(model=model)
+
+
+# --- Fake (offline) ---
+
+def _fault_settings() -> dict:
+    return {
+        "latency_ms": float(os.environ.get("FAKE_LATENCY_MS", "0")),
+        "error_rate": float(os.environ.get("FAKE_ERROR_RATE", "0")),
+        "seed": int(os.environ.get("FAKE_SEED", "0")),
+    }
+
+@register_chat_provider("fake")
+def _fake_chat(model: str, temperature: float):
+    from fake_models import ScriptedChatModel
+
+    return ScriptedChatModel(
+        max_searches=int(os.environ.get("FAKE_MAX_SEARCHES", "1")),
+        **_fault_settings()
+    )
+
+@register_embedding_provider("fake")
+def _fake_embeddings(model: str):
+    from fake_models import HashEmbeddings
+
+    return HashEmbeddings(
+        dim=int(os.environ.get("FAKE_EMBEDDING_DIM", "256")),
+        **_fault_settings()
+    )
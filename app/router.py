@@ -1,50 +1,380 @@
 import os
-import shutil
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from models import IngestResponse, ChatRequest, ChatResponse
+import time
+import hashlib
+import tempfile
+import threading
+from typing import Optional
+from fastapi import APIRouter, Request, Response, HTTPException
+from models import IngestResponse, RechunkRequest, RechunkResponse, ChatRequest, ChatResponse, HealthResponse, UsageInfo, RoutingInfo
 import service
-from simple_rag import SimpleRAG
-from agentic_rag import AgenticRAG
+from accounting import Budget, Usage, track_usage, usage_aggregator
+from routing import decide, log_decision
+from chunking import DEFAULT_STRATEGY, validate_strategy
 
 router = APIRouter()
 
-# 전역 인스턴스 초기화
-simple_rag_system = SimpleRAG()
-agentic_rag_system = AgenticRAG()
+# 프로세스 역할 (main.py --workers 모드에서 설정)
+# - all: 단일 프로세스 (기본)
+# - query: 읽기 전용 워커. 적재/재청킹은 writer 프로세스로 보내야 함
+# - writer: 적재/재청킹 전담 프로세스
+RAG_ROLE = os.environ.get("RAG_ROLE", "all")
 
-UPLOAD_DIR = "./uploads"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+def _require_writer():
+    if RAG_ROLE == "query":
+        raise HTTPException(
+            status_code=503,
+            detail=f"읽기 전용 워커입니다. 적재/재청킹은 writer 프로세스({os.environ.get('RAG_WRITER_URL', 'writer')})로 요청하세요."
+        )
+
+# --- Pipelines (lazy) ---
+# SimpleRAG/AgenticRAG는 Chroma 연결, LLM 클라이언트 생성, 그래프 컴파일 비용이 커서
+# 모듈 로드 시가 아니라 첫 사용(또는 startup warmup) 시점에 생성
+
+_pipelines = {}
+_pipeline_errors = {}
+_pipelines_lock = threading.Lock()
+
+def _build_simple_rag():
+    from simple_rag import SimpleRAG
+    return SimpleRAG()
+
+def _build_agentic_rag():
+    from agentic_rag import AgenticRAG
+    return AgenticRAG()
+
+_PIPELINE_BUILDERS = {
+    "simple": _build_simple_rag,
+    "agentic": _build_agentic_rag,
+}
+
+def get_pipeline(name: str):
+    """파이프라인 인스턴스 반환 (최초 호출 시 생성)"""
+    pipeline = _pipelines.get(name)
+    if pipeline is not None:
+        return pipeline
+    with _pipelines_lock:
+        if name not in _pipelines:
+            try:
+                _pipelines[name] = _PIPELINE_BUILDERS[name]()
+                _pipeline_errors.pop(name, None)
+            except Exception as e:
+                _pipeline_errors[name] = str(e)
+                raise
+        return _pipelines[name]
+
+def warmup_enabled() -> bool:
+    """startup 시 백그라운드에서 파이프라인을 미리 만들지 (RAG_WARMUP_ON_STARTUP, 기본 true)"""
+    return os.environ.get("RAG_WARMUP_ON_STARTUP", "true").lower() in ("1", "true", "yes")
+
+def warmup_pipelines():
+    """모든 파이프라인을 미리 생성 (startup 시 백그라운드 스레드에서 호출)"""
+    for name in _PIPELINE_BUILDERS:
+        try:
+            get_pipeline(name)
+        except Exception as e:
+            print(f"파이프라인 초기화 실패 ({name}): {e}")
+
+# --- Health ---
+
+@router.get(
+    "/health/live",
+    response_model=HealthResponse,
+    summary="Liveness 체크",
+    description="프로세스가 요청을 처리할 수 있는지만 확인합니다. 파이프라인 초기화 여부와 무관하게 즉시 응답합니다."
+)
+async def health_live():
+    return HealthResponse(status="ok", pipelines={name: name in _pipelines for name in _PIPELINE_BUILDERS})
+
+@router.get(
+    "/health/ready",
+    response_model=HealthResponse,
+    summary="Readiness 체크",
+    description=(
+        "모든 RAG 파이프라인이 초기화되었으면 200, 아직 준비 중이거나 초기화에 실패했으면 503을 반환합니다. "
+        "warmup이 꺼져 있거나(첫 요청 시 생성) writer 프로세스(채팅 요청을 받지 않음)면 파이프라인과 무관하게 200입니다."
+    )
+)
+async def health_ready(response: Response):
+    pipelines = {name: name in _pipelines for name in _PIPELINE_BUILDERS}
+    # 파이프라인을 만들 warmup이 없는 경우 준비될 때까지 기다리면 트래픽이 오지 않아 영원히 503이 됨
+    if all(pipelines.values()) or not warmup_enabled() or RAG_ROLE == "writer":
+        return HealthResponse(status="ready", pipelines=pipelines)
+    response.status_code = 503
+    return HealthResponse(status="starting", pipelines=pipelines, errors=dict(_pipeline_errors))
+
+# multipart 경계/헤더 등 파일 외 오버헤드 허용치
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+# 파일 외 폼 필드(chunking 등) 최대 길이
+MAX_FORM_FIELD_BYTES = 1024
 
 # --- Ingest ---
 
+def _too_large() -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"파일 크기가 제한({service.MAX_UPLOAD_BYTES} bytes)을 초과했습니다."
+    )
+
+async def _stream_upload(request: Request):
+    """
+    multipart 본문을 request.stream()에서 직접 파싱.
+    (UploadFile/Form 파라미터를 쓰면 핸들러 실행 전에 프레임워크가 본문 전체를 임시 파일로 spool함)
+    'file' 파트는 받는 즉시 임시 파일에 기록하면서 크기 제한 검사와 SHA-256 계산을 수행하고,
+    제한을 넘으면 나머지 본문을 읽지 않고 413으로 중단. 그 외 필드는 메모리에 보관.
+    반환: (임시 파일 경로, sha256 hex digest, 업로드 파일명, 폼 필드 dict)
+    """
+    from python_multipart.exceptions import MultipartParseError
+    from python_multipart.multipart import MultipartParser, parse_options_header
+
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    boundary = options.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise HTTPException(status_code=400, detail="multipart/form-data 요청이어야 합니다.")
+
+    hasher = hashlib.sha256()
+    fields = {}
+    part = {"headers": {}, "field": b"", "value": b"", "name": None}
+    upload = {"size": 0, "filename": None, "seen": False}
+
+    fd, tmp_path = tempfile.mkstemp(dir=service.UPLOAD_DIR, suffix=".part")
+    buffer = os.fdopen(fd, "wb")
+
+    def on_part_begin():
+        part.update(headers={}, field=b"", value=b"", name=None)
+
+    def on_header_field(data, start, end):
+        part["field"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        part["value"] += data[start:end]
+
+    def on_header_end():
+        part["headers"][part["field"].lower()] = part["value"]
+        part["field"] = part["value"] = b""
+
+    def on_headers_finished():
+        _, disposition = parse_options_header(part["headers"].get(b"content-disposition", b""))
+        name = disposition.get(b"name", b"").decode("utf-8", "replace")
+        part["name"] = name
+        if name == "file":
+            if upload["seen"]:
+                raise HTTPException(status_code=400, detail="file 필드는 하나만 허용됩니다.")
+            upload["seen"] = True
+            upload["filename"] = disposition.get(b"filename", b"").decode("utf-8", "replace")
+        else:
+            fields[name] = bytearray()
+
+    def on_part_data(data, start, end):
+        chunk = data[start:end]
+        if part["name"] == "file":
+            upload["size"] += len(chunk)
+            if upload["size"] > service.MAX_UPLOAD_BYTES:
+                raise _too_large()
+            hasher.update(chunk)
+            buffer.write(chunk)
+            return
+        field = fields[part["name"]]
+        if len(field) + len(chunk) > MAX_FORM_FIELD_BYTES:
+            raise HTTPException(status_code=400, detail=f"폼 필드가 너무 깁니다: {part['name']}")
+        field.extend(chunk)
+
+    parser = MultipartParser(boundary, {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+    })
+    try:
+        with buffer:
+            async for chunk in request.stream():
+                parser.write(chunk)
+            parser.finalize()
+        if not upload["seen"]:
+            raise HTTPException(status_code=400, detail="file 필드가 필요합니다.")
+    except MultipartParseError as e:
+        os.remove(tmp_path)
+        raise HTTPException(status_code=400, detail=f"multipart 본문을 해석할 수 없습니다: {e}")
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+    form = {name: value.decode("utf-8", "replace") for name, value in fields.items()}
+    return tmp_path, hasher.hexdigest(), upload["filename"], form
+
+def _commit_upload(tmp_path: str, digest: str):
+    """
+    임시 파일을 내용 주소(content-addressed) 경로 uploads/<sha256>로 원자적으로 이동.
+    파일명/확장자는 키에 넣지 않으므로 이름만 다른 같은 내용도 중복으로 판단 (원본 이름은 source 메타데이터로만 기록).
+    같은 해시의 파일이 이미 있으면 None 반환 (중복 업로드).
+    """
+    stored_path = os.path.join(service.UPLOAD_DIR, digest)
+    try:
+        # link는 대상이 이미 존재하면 실패하므로 동시 중복 업로드에도 하나만 성공
+        os.link(tmp_path, stored_path)
+    except FileExistsError:
+        return None
+    finally:
+        os.remove(tmp_path)
+    return stored_path
+
+# 본문을 직접 파싱하므로 요청 스키마는 OpenAPI 문서용으로만 선언
+_INGEST_REQUEST_BODY = {
+    "required": True,
+    "content": {
+        "multipart/form-data": {
+            "schema": {
+                "type": "object",
+                "required": ["file"],
+                "properties": {
+                    "file": {"type": "string", "format": "binary", "description": "업로드할 PDF 파일"},
+                    "chunking": {"type": "string", "description": "청킹 전략 이름 (미지정 시 header_recursive)"},
+                },
+            }
+        }
+    },
+}
+
 @router.post(
     "/ingest",
     response_model=IngestResponse,
     summary="PDF 문서 업로드 및 적재",
-    description="PDF 파일을 업로드하여 텍스트를 추출하고, 청크로 분할한 뒤 벡터 데이터베이스와 로컬 파일 저장소에 적재합니다."
+    description="PDF 파일을 업로드하여 텍스트를 추출하고, 청크로 분할한 뒤 벡터 데이터베이스와 로컬 파일 저장소에 적재합니다.",
+    openapi_extra={"requestBody": _INGEST_REQUEST_BODY}
 )
-async def ingest_document(file: UploadFile = File(..., description="업로드할 PDF 파일")):
+async def ingest_document(request: Request):
     """
     PDF 파일을 업로드하고 RAG 시스템에 적재합니다.
+    동일한 내용(SHA-256)의 파일이 이미 적재되어 있으면 파싱/임베딩 없이 duplicate로 응답합니다.
     """
+    _require_writer()
+    # 본문을 읽기 전에 선언된 크기로 먼저 거절 (chunked 업로드는 스트리밍 중 검사)
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > service.MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES:
+        raise _too_large()
+
+    stored_path = None
     try:
-        file_path = os.path.join(UPLOAD_DIR, file.filename)
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-            
-        chunks_count = service.ingest_document(file_path)
+        tmp_path, digest, upload_name, form = await _stream_upload(request)
+
+        strategy = form.get("chunking") or DEFAULT_STRATEGY
+        try:
+            validate_strategy(strategy, {})
+        except ValueError as e:
+            os.remove(tmp_path)
+            raise HTTPException(status_code=400, detail=str(e))
+
+        filename = os.path.basename(upload_name or "upload.pdf")
+        stored_path = _commit_upload(tmp_path, digest)
+        if stored_path is None:
+            return IngestResponse(
+                status="duplicate",
+                filename=filename,
+                chunks_count=0,
+                message="이미 적재된 문서입니다.",
+                sha256=digest
+            )
+
+        chunks_count = service.ingest_document(
+            stored_path, source_name=filename, file_hash=digest, strategy=strategy
+        )
         
         return IngestResponse(
             status="success",
-            filename=file.filename,
+            filename=filename,
             chunks_count=chunks_count,
-            message="문서가 성공적으로 적재되었습니다."
+            message="문서가 성공적으로 적재되었습니다.",
+            sha256=digest
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        # 적재 실패한 파일은 남겨두지 않아야 재업로드 시 중복으로 오판하지 않음
+        if stored_path and os.path.exists(stored_path):
+            os.remove(stored_path)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post(
+    "/rechunk",
+    response_model=RechunkResponse,
+    summary="캐시된 문서 재청킹",
+    description="캐시된 Markdown 파싱 결과로부터 새로운 청킹 설정을 적용해 부모/자식 청크와 벡터 인덱스를 재생성합니다. PDF는 다시 파싱하지 않습니다."
+)
+async def rechunk_documents(request: RechunkRequest):
+    """
+    PDF 재파싱 없이 청킹 파라미터만 바꿔서 인덱스를 재구축합니다.
+    """
+    _require_writer()
+    params = request.strategy_params()
+    try:
+        validate_strategy(request.strategy, params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        start = time.perf_counter()
+        stats = service.rechunk_corpus(strategy=request.strategy, **params)
+        return RechunkResponse(
+            status="success",
+            documents_count=stats["documents_count"],
+            chunks_count=stats["chunks_count"],
+            elapsed_seconds=round(time.perf_counter() - start, 3),
+            message="캐시된 문서를 재청킹했습니다."
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 # --- Chat ---
 
+def _run_pipeline(route: str, name: str, query: str, budget: Optional[Budget] = None):
+    """파이프라인 실행 + 요청 단위 사용량 집계. 반환: (결과 dict, UsageInfo)"""
+    start = time.perf_counter()
+    with track_usage(budget) as usage:
+        result = get_pipeline(name).get_answer(query)
+    latency = time.perf_counter() - start
+    usage_aggregator.record(route, query, usage, latency)
+    return result, UsageInfo(**usage.to_dict(), latency_ms=round(latency * 1000, 1))
+
+@router.post(
+    "/chat",
+    response_model=ChatResponse,
+    summary="적응형 RAG 채팅 (Simple 우선, 필요 시 Agentic)",
+    description="먼저 SimpleRAG로 답변하고, 답변 불가 폴백이 나오거나 검색 신뢰도(최상위 검색 결과 유사도)가 낮으면 AgenticRAG로 다시 답변합니다. 응답의 routing 필드에 판정 근거가 포함됩니다."
+)
+async def chat_adaptive(request: ChatRequest):
+    """
+    비용이 낮은 SimpleRAG를 먼저 실행하고 필요할 때만 에이전트로 승격
+    """
+    try:
+        start = time.perf_counter()
+        with track_usage() as simple_usage:
+            result = get_pipeline("simple").get_answer(request.query)
+        decision = decide(result)
+
+        usage = Usage()
+        usage.add(simple_usage)
+        if decision.escalate:
+            # 에이전트 예산은 SimpleRAG 호출과 별도로 적용
+            with track_usage(Budget.from_env()) as agentic_usage:
+                result = get_pipeline("agentic").get_answer(request.query)
+            usage.add(agentic_usage)
+        latency = time.perf_counter() - start
+
+        usage_aggregator.record(f"/chat ({decision.route})", request.query, usage, latency)
+        usage_info = UsageInfo(**usage.to_dict(), latency_ms=round(latency * 1000, 1))
+        log_decision(request.query, decision, usage.to_dict(), usage_info.latency_ms)
+
+        return ChatResponse(
+            answer=result["answer"],
+            sources=result["sources"],
+            contexts=result.get("contexts", []),
+            usage=usage_info,
+            routing=RoutingInfo(**decision.to_dict())
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.post(
     "/chat/simple",
     response_model=ChatResponse,
@@ -56,11 +386,12 @@ async def chat_simple(request: ChatRequest):
     기본적인 검색 기반 답변 생성 (Simple RAG)
     """
     try:
-        result = simple_rag_system.get_answer(request.query)
+        result, usage = _run_pipeline("/chat/simple", "simple", request.query)
         return ChatResponse(
             answer=result["answer"],
             sources=result["sources"],
-            contexts=result["contexts"]
+            contexts=result["contexts"],
+            usage=usage
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -76,10 +407,30 @@ async def chat_agentic(request: ChatRequest):
     에이전트 기반의 능동적 검색 및 답변 생성 (Agentic RAG)
     """
     try:
-        result = agentic_rag_system.get_answer(request.query)
+        result, usage = _run_pipeline("/chat/agentic", "agentic", request.query, budget=Budget.from_env())
         return ChatResponse(
             answer=result["answer"],
-            sources=result["sources"]
+            sources=result["sources"],
+            usage=usage
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+# --- Usage ---
+
+@router.get(
+    "/usage/report",
+    summary="라우트별 사용량 리포트",
+    description="마지막 주기 리포트 이후 라우트별 / 질의 분류별 누적 토큰, LLM/임베딩/도구 호출 수와 가장 비싼 질의 목록을 반환합니다."
+)
+async def usage_report():
+    return usage_aggregator.report()
+
+@router.get(
+    "/cache/embeddings",
+    summary="질의 임베딩 캐시 통계",
+    description="이 워커의 질의 임베딩 캐시 크기와 메모리/디스크 적중 수, 적중률을 반환합니다."
+)
+async def embedding_cache_stats():
+    from embedding_cache import query_embedding_cache
+    return query_embedding_cache.stats()
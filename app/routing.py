@@ -0,0 +1,86 @@
+"""
+Cheap-first 라우팅 (/chat).
+
+SimpleRAG로 먼저 답한 뒤, 다음 중 하나라도 해당하면 AgenticRAG로 다시 답합니다.
+- 답변 불가: SimpleRAG가 "제공된 문서에서 답변을 찾을 수 없습니다" 폴백을 냄
+- 검색 결과 없음
+- 검색 신뢰도 낮음: 최상위 검색 결과의 코사인 유사도 < ROUTER_MIN_TOP_SCORE
+
+라우팅 결정은 ROUTING_LOG_PATH(jsonl)에 기록되며, 임계값은 benchmarks/routing_tuning.py로 evals.jsonl에 맞춰 조정합니다.
+"""
+import os
+import json
+import time
+import threading
+from dataclasses import dataclass, asdict
+from typing import List, Optional
+
+# 유사도 분포는 임베딩 모델에 따라 다르므로 모델을 바꾸면 다시 조정
+ROUTER_MIN_TOP_SCORE = float(os.environ.get("ROUTER_MIN_TOP_SCORE", "0.4"))
+ROUTING_LOG_PATH = os.environ.get("ROUTING_LOG_PATH")
+
+NOT_FOUND_PHRASE = "제공된 문서에서 답변을 찾을 수 없습니다"
+
+_log_lock = threading.Lock()
+
+
+@dataclass
+class RoutingDecision:
+    """SimpleRAG 결과에 대한 판정"""
+    escalate: bool
+    reason: str
+    top_score: Optional[float]
+    mean_score: Optional[float]
+    unanswerable: bool
+
+    @property
+    def route(self) -> str:
+        return "agentic" if self.escalate else "simple"
+
+    def to_dict(self) -> dict:
+        return {"route": self.route, **asdict(self)}
+
+
+def is_unanswerable(answer: str) -> bool:
+    """빈 답변이거나 프롬프트가 지시한 답변 불가 폴백 문구를 포함하는지"""
+    normalized = " ".join((answer or "").split())
+    return not normalized or NOT_FOUND_PHRASE in normalized
+
+def decide(simple_result: dict, min_top_score: float = ROUTER_MIN_TOP_SCORE) -> RoutingDecision:
+    """SimpleRAG 결과(answer, scores)로 에이전트 재시도 여부 판정"""
+    scores: List[float] = simple_result.get("scores") or []
+    top_score = max(scores) if scores else None
+    mean_score = round(sum(scores) / len(scores), 4) if scores else None
+    unanswerable = is_unanswerable(simple_result.get("answer", ""))
+
+    if unanswerable:
+        reason = "unanswerable"
+    elif top_score is None:
+        reason = "no_documents"
+    elif top_score < min_top_score:
+        reason = "low_retrieval_score"
+    else:
+        reason = "confident"
+    return RoutingDecision(
+        escalate=reason != "confident",
+        reason=reason,
+        top_score=top_score,
+        mean_score=mean_score,
+        unanswerable=unanswerable
+    )
+
+def log_decision(query: str, decision: RoutingDecision, usage: dict, latency_ms: float, output_path: Optional[str] = ROUTING_LOG_PATH):
+    """라우팅 결정 한 건을 출력하고 (ROUTING_LOG_PATH가 있으면) jsonl에 추가"""
+    record = {
+        "ts": time.time(),
+        "query": query[:200],
+        **decision.to_dict(),
+        "latency_ms": latency_ms,
+        "llm_calls": usage.get("llm_calls"),
+        "total_tokens": usage.get("total_tokens"),
+    }
+    line = json.dumps(record, ensure_ascii=False)
+    print(f"[routing] {line}")
+    if output_path:
+        with _log_lock, open(output_path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
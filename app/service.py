@@ -1,67 +1,164 @@
+from __future__ import annotations
+
 import os
 import json
 import uuid
-from typing import List
+import shutil
+import hashlib
+import tempfile
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from importlib import metadata
+from typing import TYPE_CHECKING, List, Optional
 from pathlib import Path
 
 from dotenv import load_dotenv 
 
-from langchain_community.document_loaders import PyMuPDFLoader
-from langchain_text_splitters import MarkdownHeaderTextSplitter, RecursiveCharacterTextSplitter
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from langchain_chroma import Chroma
-from langchain_core.documents import Document
+# langchain / pymupdf4llm / Google 클라이언트는 import 비용이 커서 실제 사용 시점에 로드
+if TYPE_CHECKING:
+    from langchain_core.documents import Document
 
-import pymupdf4llm
+import index_store
+from providers import current_provider, get_embedding_model
+from chunking import DEFAULT_STRATEGY, get_strategy, validate_strategy
 
 # 환경 변수 로드 (.env)
 load_dotenv()
 
 # --- Configuration ---
-CHROMA_DB_DIR = "./chroma_db"
-PARENT_STORE_DIR = "./parent_store"
+CHROMA_DB_DIR = os.environ.get("CHROMA_DB_DIR", "./chroma_db")
+PARENT_STORE_DIR = os.environ.get("PARENT_STORE_DIR", "./parent_store")
+COLLECTION_NAME = "rag_collection"
 EMBEDDING_MODEL = "gemini-embedding-001"
 LLM_MODEL = "gemini-2.5-flash"
 
+# 업로드 설정
+UPLOAD_DIR = "./uploads"
+MAX_UPLOAD_BYTES = int(os.environ.get("MAX_UPLOAD_MB", "50")) * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# 파싱 결과(Markdown) 캐시: 파일 해시 + 파서 버전을 키로 사용
+PARSE_CACHE_DIR = "./parse_cache"
+
+# 적재 완료 문서 목록 (<sha256>.json): 적재가 성공한 문서만 기록되며 /rechunk는 이 목록만 다시 청킹
+# (parse_cache에는 적재 실패 문서나 벤치마크 문서가 남을 수 있으므로 재청킹 대상으로 쓰지 않음)
+INGEST_MANIFEST_DIR = "./ingested"
+
 # 디렉토리 생성
 os.makedirs(PARENT_STORE_DIR, exist_ok=True)
 os.makedirs(CHROMA_DB_DIR, exist_ok=True)
+os.makedirs(UPLOAD_DIR, exist_ok=True)
+os.makedirs(PARSE_CACHE_DIR, exist_ok=True)
 
-if not os.environ.get("GOOGLE_API_KEY"):
+if current_provider() == "google" and not os.environ.get("GOOGLE_API_KEY"):
     print("경고: GOOGLE_API_KEY가 설정되지 않았습니다.")
 
 
 # --- Shared Database Utilities ---
 
 def get_embeddings():
-    return GoogleGenerativeAIEmbeddings(model=EMBEDDING_MODEL)
+    """
+    설정된 provider(RAG_PROVIDER)의 임베딩 모델 반환.
+    질의 임베딩은 embedding_cache로 재사용하고, 실제 API 호출 수만 현재 요청 Usage에 집계.
+    """
+    from embedding_cache import CachedEmbeddings
+    from usage_tracking import CountingEmbeddings
+
+    return CachedEmbeddings(
+        CountingEmbeddings(get_embedding_model(EMBEDDING_MODEL)),
+        namespace=f"{current_provider()}:{EMBEDDING_MODEL}"
+    )
+
+_vectorstores = {}
+# 세대 전환 직후에도 이전 세대로 처리 중인 요청이 있을 수 있어 한 번의 전환 동안은 닫지 않고 보관
+_retired_vectorstores = {}
+_vectorstores_lock = threading.Lock()
 
-def get_vectorstore():
-    """ChromaDB 벡터 저장소 인스턴스 반환"""
-    return Chroma(
-        persist_directory=CHROMA_DB_DIR,
+def current_index_dirs():
+    """
+    현재 읽어야 할 (chroma 디렉토리, 부모 청크 디렉토리).
+    generations 모드에서는 가장 최근 게시된 세대, 아직 없으면 기존 디렉토리.
+    """
+    if index_store.generations_enabled():
+        generation = index_store.current_generation()
+        if generation:
+            return index_store.generation_dirs(generation)
+    return CHROMA_DB_DIR, PARENT_STORE_DIR
+
+def _open_vectorstore(persist_directory: str):
+    """
+    (chromadb 클라이언트, Chroma 저장소, 실제로 연 디렉토리) 생성.
+    게시된 세대는 읽기만 해도 chromadb가 파일을 다시 쓰므로 이 프로세스 전용 사본을 엶 (index_store.reader_dir).
+    chromadb는 경로별 시스템(SQLite 연결, HNSW 메모리)을 프로세스 전역에 캐시하므로
+    다 쓴 저장소는 _close_vectorstore로 클라이언트를 닫아야 해제됨
+    """
+    import chromadb
+    from langchain_chroma import Chroma
+
+    local_dir = index_store.reader_dir(persist_directory)
+    client = chromadb.PersistentClient(path=local_dir)
+    vectorstore = Chroma(
+        client=client,
         embedding_function=get_embeddings(),
-        collection_name="rag_collection"
+        collection_name=COLLECTION_NAME
     )
+    return client, vectorstore, local_dir
+
+def _close_vectorstore(entry):
+    client, _, local_dir = entry
+    client.close()
+    index_store.release_reader_dir(local_dir)
+
+def get_vectorstore(persist_directory: Optional[str] = None):
+    """ChromaDB 벡터 저장소 인스턴스 반환 (디렉토리별로 프로세스 내 재사용)"""
+    persist_directory = persist_directory or current_index_dirs()[0]
+    entry = _vectorstores.get(persist_directory)
+    if entry is not None:
+        return entry[1]
+    with _vectorstores_lock:
+        if persist_directory not in _vectorstores:
+            # 세대가 바뀌면 그 전 전환에서 보관한 세대의 클라이언트를 닫고, 직전 세대를 보관으로 옮김
+            # (clear()만 하면 chromadb의 전역 시스템 캐시에 세대마다 SQLite 연결/HNSW 인덱스가 남음)
+            if index_store.generations_enabled():
+                for retired in _retired_vectorstores.values():
+                    _close_vectorstore(retired)
+                _retired_vectorstores.clear()
+                _retired_vectorstores.update(_vectorstores)
+                _vectorstores.clear()
+            _vectorstores[persist_directory] = _open_vectorstore(persist_directory)
+        return _vectorstores[persist_directory][1]
+
+def _evict_vectorstore(persist_directory: str):
+    """캐시된 저장소를 버리고 chromadb 클라이언트를 닫음 (디렉토리 교체/삭제 전후)"""
+    with _vectorstores_lock:
+        entry = _vectorstores.pop(persist_directory, None)
+    if entry is not None:
+        _close_vectorstore(entry)
 
-def save_parent_chunks(chunks: List[Document]):
+def save_parent_chunks(chunks: List[Document], store_dir: Optional[str] = None):
     """부모 청크 로컬 저장"""
+    store_dir = store_dir or current_index_dirs()[1]
+    os.makedirs(store_dir, exist_ok=True)
     for chunk in chunks:
         parent_id = chunk.metadata["parent_id"]
         safe_id = "".join([c for c in parent_id if c.isalnum() or c in ('-', '_')])
-        file_path = os.path.join(PARENT_STORE_DIR, f"{safe_id}.json")
+        file_path = os.path.join(store_dir, f"{safe_id}.json")
         with open(file_path, "w", encoding="utf-8") as f:
             json.dump({
                 "page_content": chunk.page_content,
                 "metadata": chunk.metadata
             }, f, ensure_ascii=False, indent=2)
 
-def load_parent_chunks(parent_ids: List[str]) -> List[Document]:
+def load_parent_chunks(parent_ids: List[str], store_dir: Optional[str] = None) -> List[Document]:
     """부모 청크 로드"""
+    from langchain_core.documents import Document
+
+    store_dir = store_dir or current_index_dirs()[1]
     documents = []
     for pid in parent_ids:
         safe_id = "".join([c for c in pid if c.isalnum() or c in ('-', '_')])
-        file_path = os.path.join(PARENT_STORE_DIR, f"{safe_id}.json")
+        file_path = os.path.join(store_dir, f"{safe_id}.json")
         if os.path.exists(file_path):
             with open(file_path, "r", encoding="utf-8") as f:
                 data = json.load(f)
@@ -71,54 +168,300 @@ def load_parent_chunks(parent_ids: List[str]) -> List[Document]:
                 ))
     return documents
 
-def ingest_document(file_path: str) -> int:
+# --- Parse Cache ---
+
+@lru_cache(maxsize=1)
+def parser_version() -> str:
+    """파서 버전 문자열 (패키지 메타데이터에서 조회하므로 pymupdf4llm을 import하지 않음)"""
+    try:
+        return f"pymupdf4llm-{metadata.version('pymupdf4llm')}"
+    except metadata.PackageNotFoundError:
+        return "pymupdf4llm-unknown"
+
+def file_sha256(file_path: str) -> str:
+    """파일 내용의 SHA-256 해시 계산"""
+    hasher = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(UPLOAD_CHUNK_SIZE), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+def _parse_cache_key(file_hash: str) -> str:
+    safe_version = "".join([c for c in parser_version() if c.isalnum() or c in ('-', '_', '.')])
+    return f"{file_hash}_{safe_version}"
+
+def _write_atomic(path: str, text: str):
+    """임시 파일에 쓴 뒤 rename하여 반쯤 쓰인 캐시 파일이 보이지 않도록 함"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+def load_markdown(
+    file_path: str,
+    file_hash: Optional[str] = None,
+    source_name: Optional[str] = None,
+    cache_dir: Optional[str] = None
+) -> str:
     """
-    공통 문서 적재 로직: PDF -> Markdown -> Parent/Child Chunks -> Store
+    PDF -> Markdown 변환. 같은 해시/파서 버전의 결과가 캐시에 있으면 재사용.
+    cache_dir: 파싱 캐시 디렉토리 (기본 PARSE_CACHE_DIR, 벤치마크 등은 임시 디렉토리 지정)
     """
-    file_path_obj = Path(file_path)
-    
-    # 1. PDF -> Markdown
+    cache_dir = cache_dir or PARSE_CACHE_DIR
+    os.makedirs(cache_dir, exist_ok=True)
+    file_hash = file_hash or file_sha256(file_path)
+    key = _parse_cache_key(file_hash)
+    md_path = os.path.join(cache_dir, f"{key}.md")
+    meta_path = os.path.join(cache_dir, f"{key}.json")
+
+    if os.path.exists(md_path):
+        with open(md_path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    import pymupdf4llm
+
     md_text = pymupdf4llm.to_markdown(file_path)
+    _write_atomic(md_path, md_text)
+    # 메타데이터는 Markdown 이후에 기록: 메타가 있으면 Markdown도 반드시 존재
+    _write_atomic(meta_path, json.dumps({
+        "source": source_name or Path(file_path).name,
+        "sha256": file_hash,
+        "parser_version": parser_version()
+    }, ensure_ascii=False, indent=2))
+    return md_text
 
-    # 2. Parent Chunking (Header based)
-    headers_to_split_on = [("#", "Header 1"), ("##", "Header 2"), ("###", "Header 3")]
-    parent_splitter = MarkdownHeaderTextSplitter(headers_to_split_on=headers_to_split_on)
-    parent_chunks = parent_splitter.split_text(md_text)
-    
-    if not parent_chunks:
-        parent_chunks = [Document(page_content=md_text, metadata={})]
+# --- Ingest Manifest ---
+
+def _manifest_entry(file_hash: str, source_name: str, file_path: str) -> str:
+    return json.dumps({"sha256": file_hash, "source": source_name, "path": file_path}, ensure_ascii=False, indent=2)
+
+def record_ingested(file_hash: str, source_name: str, file_path: str):
+    """적재가 끝난 문서를 매니페스트에 기록 (적재 성공 후에만 호출)"""
+    if not os.path.isdir(INGEST_MANIFEST_DIR):
+        _seed_manifest_from_uploads()
+    _write_atomic(os.path.join(INGEST_MANIFEST_DIR, f"{file_hash}.json"), _manifest_entry(file_hash, source_name, file_path))
+
+def _seed_manifest_from_uploads():
+    """
+    매니페스트 도입 이전에 적재된 문서 등록: 적재 실패 파일은 삭제되므로 uploads/에 남은 파일이 곧 적재 완료 문서.
+    임시 디렉토리에 만든 뒤 rename하여 중간에 실패해도 반쯤 만든 매니페스트가 보이지 않도록 함
+    """
+    manifest_dir = os.path.abspath(INGEST_MANIFEST_DIR)
+    staging_dir = tempfile.mkdtemp(prefix=os.path.basename(manifest_dir) + ".seed-", dir=os.path.dirname(manifest_dir))
+    for name in sorted(os.listdir(UPLOAD_DIR)):
+        # 예전 저장 이름은 <sha256><확장자>
+        file_hash = name.split(".", 1)[0]
+        if name.endswith(".part") or len(file_hash) != 64:
+            continue
+        source_name = name
+        meta_path = os.path.join(PARSE_CACHE_DIR, f"{_parse_cache_key(file_hash)}.json")
+        if os.path.exists(meta_path):
+            with open(meta_path, "r", encoding="utf-8") as f:
+                source_name = json.load(f).get("source", name)
+        _write_atomic(
+            os.path.join(staging_dir, f"{file_hash}.json"),
+            _manifest_entry(file_hash, source_name, os.path.join(UPLOAD_DIR, name))
+        )
+    try:
+        os.rename(staging_dir, INGEST_MANIFEST_DIR)
+    except OSError:
+        # 다른 프로세스가 먼저 만든 경우
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+def iter_ingested_markdown():
+    """
+    적재 완료 문서의 (source, Markdown) 순회.
+    현재 파서 버전의 캐시가 없으면 저장된 원본(uploads/<sha256>)에서 다시 파싱
+    """
+    if not os.path.isdir(INGEST_MANIFEST_DIR):
+        _seed_manifest_from_uploads()
+    for name in sorted(os.listdir(INGEST_MANIFEST_DIR)):
+        if not name.endswith(".json"):
+            continue
+        with open(os.path.join(INGEST_MANIFEST_DIR, name), "r", encoding="utf-8") as f:
+            entry = json.load(f)
+        yield entry["source"], load_markdown(entry["path"], file_hash=entry["sha256"], source_name=entry["source"])
+
+# --- Chunking & Ingest ---
 
-    # 3. Child Chunking
-    child_splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=100)
+def chunk_markdown(md_text: str, source_name: str, strategy: str = DEFAULT_STRATEGY, **params):
+    """
+    Markdown -> Parent/Child Chunks (선택한 청킹 전략 사용)
+    반환: (부모 청크 목록, 자식 청크 목록)
+    """
+    source_path = Path(source_name)
+    pairs = get_strategy(strategy)(md_text, **params)
     
     all_parent_chunks = []
     all_child_chunks = []
 
-    for i, parent_chunk in enumerate(parent_chunks):
+    for i, (parent_chunk, child_chunks) in enumerate(pairs):
         unique_id = uuid.uuid4().hex[:8]
-        parent_id = f"{file_path_obj.stem}_p{i}_{unique_id}"
+        parent_id = f"{source_path.stem}_p{i}_{unique_id}"
         
         parent_chunk.metadata["parent_id"] = parent_id
-        parent_chunk.metadata["source"] = file_path_obj.name
+        parent_chunk.metadata["source"] = source_path.name
+        parent_chunk.metadata["chunking"] = strategy
         all_parent_chunks.append(parent_chunk)
         
-        child_chunks = child_splitter.split_documents([parent_chunk])
         for child in child_chunks:
             child.metadata["parent_id"] = parent_id
-            child.metadata["source"] = file_path_obj.name
+            child.metadata["source"] = source_path.name
+            child.metadata["chunking"] = strategy
             all_child_chunks.append(child)
 
-    if not all_child_chunks:
+    return all_parent_chunks, all_child_chunks
+
+_single_writer_lock = threading.Lock()
+
+def _swap_dir(staging_dir: str, live_dir: str):
+    """staging_dir를 live_dir 자리로 옮기고 이전 디렉토리는 삭제"""
+    backup_dir = f"{live_dir}.old-{uuid.uuid4().hex[:8]}"
+    if os.path.exists(live_dir):
+        os.rename(live_dir, backup_dir)
+    os.rename(staging_dir, live_dir)
+    shutil.rmtree(backup_dir, ignore_errors=True)
+
+def _settle_generation(chroma_dir: str):
+    """
+    게시 전에 새 세대를 한 번 열어 질의하고 닫음: chromadb는 쌓인 쓰기 로그를 첫 로드 때 HNSW 인덱스에 반영해 저장하므로
+    writer가 미리 해 두어 reader 사본마다 로그를 다시 적용하지 않도록 함. 임베딩 API 없이 저장된 벡터 하나로 질의
+    """
+    import chromadb
+    from chromadb.errors import NotFoundError
+
+    client = chromadb.PersistentClient(path=chroma_dir)
+    try:
+        collection = client.get_collection(COLLECTION_NAME)
+        sample = collection.get(limit=1, include=["embeddings"])["embeddings"]
+        if sample is not None and len(sample):
+            collection.query(query_embeddings=[list(sample[0])], n_results=1)
+    except NotFoundError:
+        # 청크가 하나도 저장되지 않은 세대
+        pass
+    finally:
+        client.close()
+
+@contextmanager
+def index_writer(rebuild: bool = False):
+    """
+    인덱스 쓰기 구간. (chroma 디렉토리, 부모 청크 디렉토리)를 yield.
+    generations 모드: 단일 writer 락 아래 새 세대에 기록하고 블록 종료 시 게시
+    single 모드: 현재 디렉토리에 바로 기록
+    rebuild: 빈 디렉토리에 처음부터 구축해 블록이 성공적으로 끝난 경우에만 기존 인덱스와 교체
+             (실패하면 기존 인덱스는 그대로 유지)
+    """
+    if index_store.generations_enabled():
+        with index_store.new_generation((CHROMA_DB_DIR, PARENT_STORE_DIR), copy_current=not rebuild) as dirs:
+            yield dirs
+            _settle_generation(dirs[0])
+        return
+
+    with _single_writer_lock:
+        if not rebuild:
+            yield CHROMA_DB_DIR, PARENT_STORE_DIR
+            return
+
+        suffix = f".rebuild-{uuid.uuid4().hex[:8]}"
+        staging_chroma, staging_parent = CHROMA_DB_DIR + suffix, PARENT_STORE_DIR + suffix
+        os.makedirs(staging_chroma)
+        os.makedirs(staging_parent)
+        try:
+            yield staging_chroma, staging_parent
+        except BaseException:
+            shutil.rmtree(staging_chroma, ignore_errors=True)
+            shutil.rmtree(staging_parent, ignore_errors=True)
+            raise
+
+        # 교체 후 이전 클라이언트를 닫아야 같은 경로로 새 디렉토리를 다시 열 수 있음
+        _swap_dir(staging_parent, PARENT_STORE_DIR)
+        _swap_dir(staging_chroma, CHROMA_DB_DIR)
+        _evict_vectorstore(CHROMA_DB_DIR)
+
+def store_chunks(
+    parent_chunks: List[Document],
+    child_chunks: List[Document],
+    persist_directory: Optional[str] = None,
+    parent_store_dir: Optional[str] = None
+) -> int:
+    """부모 청크는 로컬 파일로, 자식 청크는 벡터 DB에 저장 (디렉토리 미지정 시 현재 인덱스)"""
+    import chromadb
+    from langchain_chroma import Chroma
+
+    if not child_chunks:
         return 0
 
-    # 4. Store
-    save_parent_chunks(all_parent_chunks)
-    
-    Chroma.from_documents(
-        documents=all_child_chunks,
-        embedding=get_embeddings(),
-        persist_directory=CHROMA_DB_DIR,
-        collection_name="rag_collection"
-    )
+    default_chroma, default_parent = current_index_dirs()
+    persist_directory = persist_directory or default_chroma
+    parent_store_dir = parent_store_dir or default_parent
+
+    save_parent_chunks(parent_chunks, store_dir=parent_store_dir)
+
+    # 쓰기용 클라이언트는 매번 닫아 경로별 chromadb 시스템이 남지 않도록 함
+    client = chromadb.PersistentClient(path=persist_directory)
+    try:
+        Chroma.from_documents(
+            documents=child_chunks,
+            embedding=get_embeddings(),
+            client=client,
+            collection_name=COLLECTION_NAME
+        )
+    finally:
+        client.close()
+
+    return len(child_chunks)
+
+def ingest_document(
+    file_path: str,
+    source_name: Optional[str] = None,
+    file_hash: Optional[str] = None,
+    strategy: str = DEFAULT_STRATEGY,
+    **params
+) -> int:
+    """
+    공통 문서 적재 로직: PDF -> Markdown(캐시) -> Parent/Child Chunks -> Store
+
+    source_name: 출처로 기록할 원본 파일명 (업로드 파일은 해시 이름으로 저장되므로 별도 전달)
+    file_hash: 이미 계산된 SHA-256 (없으면 파일을 읽어 계산)
+    strategy, params: 청킹 전략 이름과 전략별 파라미터 (chunking.CHUNKING_STRATEGIES 참고)
+    """
+    source_name = source_name or Path(file_path).name
+    file_hash = file_hash or file_sha256(file_path)
+    md_text = load_markdown(file_path, file_hash=file_hash, source_name=source_name)
+    chunks_count = ingest_markdown(md_text, source_name, strategy=strategy, **params)
+    # 인덱스 저장까지 성공한 문서만 재청킹 대상으로 기록
+    record_ingested(file_hash, source_name, file_path)
+    return chunks_count
+
+def ingest_markdown(md_text: str, source_name: str, strategy: str = DEFAULT_STRATEGY, **params) -> int:
+    """Markdown 텍스트를 청킹해 현재 인덱스에 추가"""
+    parent_chunks, child_chunks = chunk_markdown(md_text, source_name, strategy=strategy, **params)
+    if not child_chunks:
+        return 0
+    with index_writer() as (chroma_dir, parent_dir):
+        return store_chunks(parent_chunks, child_chunks, persist_directory=chroma_dir, parent_store_dir=parent_dir)
+
+def rechunk_corpus(strategy: str = DEFAULT_STRATEGY, **params) -> dict:
+    """
+    적재 완료 문서(매니페스트)의 캐시된 Markdown만으로 부모/자식 청크와 벡터를 재생성.
+    PDF는 파서 버전이 바뀌어 캐시가 없을 때만 다시 파싱.
+    """
+    # 잘못된 전략/파라미터로 기존 인덱스를 지우지 않도록 먼저 검증
+    validate_strategy(strategy, params)
+
+    # 청킹을 전부 끝낸 뒤에만 인덱스를 건드림 (청킹 오류 시 기존 인덱스 유지)
+    chunked = [
+        chunk_markdown(md_text, source_name, strategy=strategy, **params)
+        for source_name, md_text in iter_ingested_markdown()
+    ]
+
+    chunks_count = 0
+    # 빈 새 인덱스에 구축 후 성공 시에만 교체 (임베딩 오류 시에도 기존 인덱스 유지)
+    with index_writer(rebuild=True) as (chroma_dir, parent_dir):
+        for parent_chunks, child_chunks in chunked:
+            chunks_count += store_chunks(
+                parent_chunks, child_chunks,
+                persist_directory=chroma_dir, parent_store_dir=parent_dir
+            )
 
-    return len(all_child_chunks)
+    return {"documents_count": len(chunked), "chunks_count": chunks_count}
@@ -1,28 +1,33 @@
 from typing import Dict, Any
 
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import PromptTemplate
-from langchain_classic.chains import create_retrieval_chain
 from langchain_classic.chains.combine_documents import create_stuff_documents_chain
 
+from accounting import usage_callbacks
+from providers import get_chat_model
 from service import get_vectorstore, LLM_MODEL
 
+def cosine_similarity(distance: float) -> float:
+    """
+    Chroma 기본(l2) 컬렉션의 거리 -> 코사인 유사도.
+    Chroma는 제곱 L2 거리를 돌려주므로 정규화된 임베딩에서 cos = 1 - d / 2
+    """
+    return 1.0 - distance / 2.0
+
 class SimpleRAG:
     """
     Standard Retrieve-Read RAG pipeline.
     """
     def __init__(self):
-        self.vectorstore = get_vectorstore()
-        self.llm = ChatGoogleGenerativeAI(model=LLM_MODEL, temperature=0)
+        self.llm = get_chat_model(LLM_MODEL, temperature=0)
         
     def get_answer(self, query: str) -> Dict[str, Any]:
         """
         기본적인 검색 기반 답변 생성 (Retrieve-Read)
         """
-        retriever = self.vectorstore.as_retriever(
-            search_type="similarity",
-            search_kwargs={"k": 4}
-        )
+        # 멀티 워커 모드에서 새 인덱스 세대가 게시되면 바로 반영되도록 요청마다 조회
+        retrieved = get_vectorstore().similarity_search_with_score(query, k=4)
+        docs = [doc for doc, _ in retrieved]
         
         prompt_template = """다음 문맥(Context)을 바탕으로 질문에 답변해 주세요.
         만약 문맥에서 답을 찾을 수 없다면 "제공된 문서에서 답변을 찾을 수 없습니다."라고 말해 주세요.
@@ -40,14 +45,14 @@ class SimpleRAG:
         )
         
         combine_docs_chain = create_stuff_documents_chain(self.llm, PROMPT)
-        qa_chain = create_retrieval_chain(retriever, combine_docs_chain)
-        
-        result = qa_chain.invoke({"input": query})
+        answer = combine_docs_chain.invoke(
+            {"input": query, "context": docs}, config={"callbacks": usage_callbacks()}
+        )
         
         # 출처 포맷팅
         sources = []
         contexts = []
-        for doc in result.get("context", []):
+        for doc in docs:
             sources.append({
                 "source": doc.metadata.get("source", "unknown"),
                 "page": 0,
@@ -56,7 +61,9 @@ class SimpleRAG:
             contexts.append(doc.page_content)
             
         return {
-            "answer": result.get("answer", ""),
+            "answer": answer,
             "sources": sources,
-            "contexts": contexts
+            "contexts": contexts,
+            # /chat 라우팅(routing.py)의 검색 신뢰도
+            "scores": [round(cosine_similarity(distance), 4) for _, distance in retrieved]
         }
@@ -0,0 +1,64 @@
+"""
+LangChain 콜백/임베딩 래퍼로 호출 사용량을 accounting.Usage에 기록.
+(langchain_core import 비용 때문에 accounting.py와 분리)
+"""
+from typing import Any, Dict, List
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.embeddings import Embeddings
+from langchain_core.outputs import LLMResult
+
+from accounting import Usage, current_usage
+
+
+class UsageCallbackHandler(BaseCallbackHandler):
+    """LLM 호출 수, 프롬프트/생성 토큰, 도구 호출 수 집계"""
+    def __init__(self, usage: Usage):
+        self.usage = usage
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[List[Any]], **kwargs: Any):
+        self.usage.add_llm_call()
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], **kwargs: Any):
+        self.usage.add_llm_call()
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any):
+        prompt_tokens = 0
+        completion_tokens = 0
+        found = False
+        for generations in response.generations:
+            for generation in generations:
+                metadata = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if metadata:
+                    prompt_tokens += metadata.get("input_tokens", 0)
+                    completion_tokens += metadata.get("output_tokens", 0)
+                    found = True
+        if not found and response.llm_output:
+            token_usage = response.llm_output.get("token_usage") or response.llm_output.get("usage_metadata") or {}
+            prompt_tokens = token_usage.get("prompt_tokens", token_usage.get("input_tokens", 0))
+            completion_tokens = token_usage.get("completion_tokens", token_usage.get("output_tokens", 0))
+        self.usage.add_tokens(prompt_tokens, completion_tokens)
+
+    def on_tool_start(self, serialized: Dict[str, Any], input_str: str, **kwargs: Any):
+        name = (serialized or {}).get("name") or kwargs.get("name") or "unknown"
+        self.usage.add_tool_call(name)
+
+
+class CountingEmbeddings(Embeddings):
+    """
+    임베딩 모델 래퍼. 임베딩은 LangChain 콜백을 발생시키지 않으므로 호출 시점의 현재 Usage에 직접 기록.
+    """
+    def __init__(self, inner: Embeddings):
+        self.inner = inner
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        usage = current_usage()
+        if usage is not None:
+            usage.add_embedding_call(len(texts))
+        return self.inner.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        usage = current_usage()
+        if usage is not None:
+            usage.add_embedding_call(1)
+        return self.inner.embed_query(text)